@@ -0,0 +1,341 @@
+"""
+Benchmarks data generation and training data preparation.
+
+Runs offline on CPU using stub pipelines in place of language models, which measures the overhead of txtinstruct itself. Language
+generation benchmarks compare static batching with the continuous batching Scheduler using a small randomly initialized model. Results
+are written as JSON so runs can be compared across versions.
+
+Usage:
+    python benchmarks/benchmark.py --sizes 1000 10000 --output benchmark.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from datetime import datetime, timezone
+from importlib.metadata import PackageNotFoundError, version
+
+import torch
+
+from datasets import Dataset
+from tokenizers import Tokenizer, models, pre_tokenizers
+from transformers import AutoConfig, AutoModelForCausalLM, PreTrainedTokenizerFast
+
+from txtinstruct.data import DatasetBuilder, Scheduler
+from txtinstruct.models import BashSQL, Instructor, StatementGenerator, TxtSQL
+
+
+class Stub:
+    """
+    Stub text generation pipeline. Returns deterministic text derived from each input without running a model.
+    """
+
+    def __init__(self, architecture):
+        """
+        Creates a new Stub pipeline.
+
+        Args:
+            architecture: model architecture name, used by DatasetBuilder to infer the model task
+        """
+
+        # Mimic the model configuration read by DatasetBuilder.infertask
+        config = type("Config", (), {"architectures": [architecture], "_name_or_path": f"stub-{architecture}"})
+        self.model = type("Model", (), {"config": config, "name_or_path": config._name_or_path})
+
+    def __call__(self, texts, **kwargs):
+        return [f"Generated text for {text[-50:]}" for text in texts]
+
+
+class Benchmark:
+    """
+    Runs benchmarks and collects results.
+    """
+
+    def __init__(self, sizes, repeat):
+        """
+        Creates a new Benchmark.
+
+        Args:
+            sizes: list of input sizes
+            repeat: number of timed runs per benchmark, the fastest run is reported
+        """
+
+        self.sizes = sizes
+        self.repeat = repeat
+        self.results = []
+
+        # Temporary directory for generated files
+        self.directory = tempfile.mkdtemp()
+
+    def __call__(self):
+        """
+        Runs all benchmarks.
+
+        Returns:
+            results
+        """
+
+        try:
+            for size in self.sizes:
+                self.run("datasetbuilder", size, self.builder)
+                self.run("txtsql", size, self.txtsql)
+                self.run("bashsql", size, self.bashsql)
+                self.run("instructor", size, self.instructor)
+                self.run("statementgenerator", size, self.statement)
+                self.run("staticbatching", size, self.static)
+                self.run("scheduler", size, self.scheduler)
+        finally:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+        return {
+            "version": self.version(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "results": self.results,
+        }
+
+    def run(self, name, size, function):
+        """
+        Runs a benchmark. Each benchmark is timed, then run once more with memory tracing enabled to measure peak memory.
+
+        Args:
+            name: benchmark name
+            size: input size
+            function: benchmark function, takes size and returns the number of rows generated
+        """
+
+        seconds = None
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            rows = function(size)
+            elapsed = time.perf_counter() - start
+            seconds = min(seconds, elapsed) if seconds else elapsed
+
+        # Separate run with tracing enabled, tracing slows down execution
+        tracemalloc.start()
+        function(size)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        result = {"name": name, "size": size, "rows": rows, "seconds": seconds, "rowspersec": rows / seconds, "memory": peak}
+        self.results.append(result)
+
+        print(f"{name:<20} {size:>10} {rows / seconds:>15,.0f} rows/sec {peak / 1024 / 1024:>10.1f} MB", file=sys.stderr)
+
+    def builder(self, size):
+        """
+        Benchmarks DatasetBuilder.
+
+        Args:
+            size: number of input rows
+
+        Returns:
+            number of rows generated
+        """
+
+        builder = DatasetBuilder(Stub("T5ForConditionalGeneration"), Stub("T5ForConditionalGeneration"), templates=["Tell me about {text}"])
+        builder(self.rows(size), size, os.path.join(self.directory, "builder.jsonl"))
+
+        return size
+
+    def txtsql(self, size):
+        """
+        Benchmarks TxtSQL data generation.
+
+        Args:
+            size: number of queries
+
+        Returns:
+            number of rows generated
+        """
+
+        return sum(1 for _ in TxtSQL().generate(self.queries(size)))
+
+    def bashsql(self, size):
+        """
+        Benchmarks BashSQL data generation.
+
+        Args:
+            size: number of queries
+
+        Returns:
+            number of rows generated
+        """
+
+        return sum(1 for _ in BashSQL().generate(self.queries(size)))
+
+    def instructor(self, size):
+        """
+        Benchmarks Instructor training dataset preparation.
+
+        Args:
+            size: number of input rows
+
+        Returns:
+            number of rows generated
+        """
+
+        instructor = Instructor()
+        data = [
+            {"context": row["text"], "statements": [{"source": f"Question {row['id']}", "target": f"Answer {row['id']}"}] * 3}
+            for row in self.rows(size)
+        ]
+
+        kwargs = {"data": data, "task": "language-generation", "prompt": instructor.defaultprompt("language-generation")}
+        return len(Dataset.from_generator(instructor.generate, gen_kwargs=kwargs, cache_dir=tempfile.mkdtemp(dir=self.directory)))
+
+    def statement(self, size):
+        """
+        Benchmarks StatementGenerator training dataset preparation.
+
+        Args:
+            size: number of input rows
+
+        Returns:
+            number of rows generated
+        """
+
+        generator = StatementGenerator()
+        data = [{"context": row["text"], "question": f"Question {row['id']}"} for row in self.rows(size)]
+
+        kwargs = {"data": data, "task": "sequence-sequence", "prompt": generator.defaultprompt("sequence-sequence")}
+        return len(Dataset.from_generator(generator.generate, gen_kwargs=kwargs, cache_dir=tempfile.mkdtemp(dir=self.directory)))
+
+    def static(self, size):
+        """
+        Benchmarks language generation with static batching, the baseline for the Scheduler benchmark. Each batch runs until its
+        longest output finishes, stop strings are only applied after generation.
+
+        Args:
+            size: number of input rows, one prompt is generated per 10 rows
+
+        Returns:
+            number of prompts generated
+        """
+
+        model, tokenizer, prompts, _ = self.generation(size)
+
+        # Left padding aligns the last prompt token of each sequence
+        tokenizer.padding_side = "left"
+
+        for x in range(0, len(prompts), 8):
+            inputs = tokenizer(prompts[x : x + 8], padding=True, return_tensors="pt")
+            with torch.no_grad():
+                outputs = model.generate(**inputs, max_new_tokens=64, do_sample=False, pad_token_id=tokenizer.pad_token_id)
+
+            tokenizer.batch_decode(outputs[:, inputs["input_ids"].shape[1] :], skip_special_tokens=True)
+
+        return len(prompts)
+
+    def scheduler(self, size):
+        """
+        Benchmarks language generation with the continuous batching Scheduler. Slots are released once a stop string is generated.
+
+        Args:
+            size: number of input rows, one prompt is generated per 10 rows
+
+        Returns:
+            number of prompts generated
+        """
+
+        model, tokenizer, prompts, stop = self.generation(size)
+        Scheduler(model, tokenizer, slots=8, step=4, maxtokens=64, stop=stop)(prompts)
+
+        return len(prompts)
+
+    def generation(self, size):
+        """
+        Creates a small randomly initialized language model along with prompts and stop strings. Stop strings are drawn from the
+        vocabulary, which gives outputs a mix of short and long lengths.
+
+        Args:
+            size: number of input rows
+
+        Returns:
+            (model, tokenizer, prompts, stop strings)
+        """
+
+        words = [f"w{x}" for x in range(200)]
+        vocab = {"<eos>": 0, **{word: x + 1 for x, word in enumerate(words)}}
+
+        tokenizer = Tokenizer(models.WordLevel(vocab, unk_token="<eos>"))
+        tokenizer.pre_tokenizer = pre_tokenizers.WhitespaceSplit()
+        tokenizer = PreTrainedTokenizerFast(tokenizer_object=tokenizer, eos_token="<eos>", pad_token="<eos>")
+
+        torch.manual_seed(size)
+        config = AutoConfig.for_model("gpt2", vocab_size=len(vocab), n_layer=4, n_head=4, n_embd=256, bos_token_id=0, eos_token_id=0, pad_token_id=0)
+        model = AutoModelForCausalLM.from_config(config).eval()
+
+        generator = random.Random(size)
+        prompts = [" ".join(generator.choices(words, k=generator.randint(50, 300))) for _ in range(max(size // 10, 1))]
+
+        return model, tokenizer, prompts, words[:4]
+
+    def rows(self, size):
+        """
+        Generates deterministic input rows with a mix of short and long texts.
+
+        Args:
+            size: number of rows
+
+        Returns:
+            list of {id, text}
+        """
+
+        generator = random.Random(size)
+        words = ["data", "model", "search", "query", "index", "text", "language", "vector", "train", "token"]
+
+        return [{"id": f"topic {x}", "text": " ".join(generator.choices(words, k=generator.randint(50, 2000)))} for x in range(size)]
+
+    def queries(self, size):
+        """
+        Writes a queries file.
+
+        Args:
+            size: number of queries
+
+        Returns:
+            queries file path
+        """
+
+        path = os.path.join(self.directory, f"queries-{size}.txt")
+        if not os.path.exists(path):
+            with open(path, "w", encoding="utf-8") as f:
+                for x in range(size):
+                    f.write(f"query number {x}\n")
+
+        return path
+
+    def version(self):
+        """
+        Gets the installed txtinstruct version.
+
+        Returns:
+            version or None if not installed as a package
+        """
+
+        try:
+            return version("txtinstruct")
+        except PackageNotFoundError:
+            return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="txtinstruct benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000], help="input sizes")
+    parser.add_argument("--repeat", type=int, default=3, help="number of timed runs per benchmark")
+    parser.add_argument("--output", default="benchmark.json", help="output results file")
+    args = parser.parse_args()
+
+    results = Benchmark(args.sizes, args.repeat)()
+    with open(args.output, "w", encoding="utf-8") as output:
+        json.dump(results, output, indent=4)
@@ -21,12 +21,14 @@ setup(
     license="Apache 2.0: http://www.apache.org/licenses/LICENSE-2.0",
     packages=find_packages(where="src/python"),
     package_dir={"": "src/python"},
+    package_data={"txtinstruct.models": ["templates/*.json"]},
+    entry_points={"console_scripts": ["txtinstruct = txtinstruct.cli:main"]},
     keywords="search embedding machine-learning nlp",
     python_requires=">=3.8",
     install_requires=[
         "datasets>=2.8.0",
         "tqdm>=4.48.0",
-        "txtai>=5.5.0",
+        "txtai>=7.0.0",
     ],
     classifiers=[
         "License :: OSI Approved :: Apache Software License",
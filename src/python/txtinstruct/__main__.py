@@ -0,0 +1,8 @@
+"""
+Main module
+"""
+
+from .cli import main
+
+if __name__ == "__main__":
+    main()
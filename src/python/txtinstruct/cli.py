@@ -0,0 +1,303 @@
+"""
+CLI module
+"""
+
+import argparse
+import json
+import sys
+
+from .data import (
+    AsyncDatasetBuilder,
+    DatasetBuilder,
+    Deduplicate,
+    IncrementalBuilder,
+    Metrics,
+    Negatives,
+    Reader,
+    RemoteModel,
+    Scheduler,
+    ShardedBuilder,
+)
+from .models import BashSQL, Instructor, StatementGenerator, TxtSQL
+
+
+class Factory:
+    """
+    Creates a DatasetBuilder from a build configuration. Factory instances are picklable, which allows creating builders in
+    ShardedBuilder processes.
+    """
+
+    def __init__(self, config):
+        """
+        Creates a new Factory.
+
+        Args:
+            config: build configuration
+        """
+
+        self.config = config
+
+    def __call__(self):
+        """
+        Creates a DatasetBuilder.
+
+        Returns:
+            DatasetBuilder
+        """
+
+        model, statement = self.model(self.config["model"]), self.model(self.config["statement"])
+
+        # Builder arguments
+        kwargs = dict(self.config.get("builder", {}))
+        if isinstance(kwargs.get("dedup"), dict):
+            kwargs["dedup"] = Deduplicate(**kwargs["dedup"])
+        if isinstance(kwargs.get("negatives"), dict):
+            kwargs["negatives"] = Negatives(**kwargs["negatives"])
+        if isinstance(kwargs.get("metrics"), str):
+            kwargs["metrics"] = Metrics(path=kwargs["metrics"])
+
+        # Keep requests in flight concurrently for remote models
+        builder = AsyncDatasetBuilder if isinstance(model, RemoteModel) or isinstance(statement, RemoteModel) else DatasetBuilder
+        return builder(model, statement, **kwargs)
+
+    def model(self, config):
+        """
+        Creates a text generation model. The configuration is either a model path or a dict. Dicts with a url create a RemoteModel,
+        dicts with slots create a continuous batching Scheduler for language-generation models, other dicts support path, task
+        (sequence-sequence or language-generation) and additional pipeline arguments.
+
+        Args:
+            config: model configuration
+
+        Returns:
+            text generation model
+        """
+
+        config = {"path": config} if isinstance(config, str) else dict(config)
+
+        if "url" in config:
+            return RemoteModel(**config)
+
+        if "slots" in config:
+            # Scheduler only runs language-generation models
+            return Scheduler(
+                config["path"],
+                tokenizer=config.get("tokenizer"),
+                slots=config["slots"],
+                step=config.get("step", 32),
+                maxtokens=config.get("maxtokens", 256),
+                stop=config.get("stop"),
+            )
+
+        # pylint: disable=C0415
+        from txtai.pipeline import Generator, Sequences
+
+        # Remaining keys are pipeline arguments
+        path, task = config["path"], config.get("task", "sequence-sequence")
+        kwargs = {key: value for key, value in config.items() if key not in ["path", "task"]}
+
+        return Generator(path, **kwargs) if task == "language-generation" else Sequences(path, **kwargs)
+
+
+class CLI:
+    """
+    Command line interface for building datasets and training models. Each command reads a JSON or YAML configuration file,
+    command line options override configuration values.
+    """
+
+    def __init__(self, args):
+        """
+        Creates a new CLI.
+
+        Args:
+            args: parsed command line arguments
+        """
+
+        self.args = args
+        self.config = self.load(args.config)
+
+        # Command line overrides
+        for key in ["output", "shard", "shards", "workers"]:
+            if getattr(args, key, None) is not None:
+                self.config[key] = getattr(args, key)
+
+        if getattr(args, "resume", False):
+            self.config["resume"] = True
+
+    def __call__(self):
+        """
+        Runs the selected command.
+        """
+
+        commands = {
+            "build": self.build,
+            "merge": self.merge,
+            "train-instructor": self.instructor,
+            "train-statement": self.statement,
+            "txtsql": self.txtsql,
+            "bashsql": self.bashsql,
+        }
+
+        commands[self.args.command]()
+
+    def build(self):
+        """
+        Builds a dataset. When shards is set, either a single shard is built (shard set) for running shards on separate nodes or all
+        shards are built in local processes and merged. When incremental is set to a directory, only new and changed rows are
+        generated, see IncrementalBuilder.
+        """
+
+        config = self.config
+        rows = Reader(config["input"], config.get("columns"))
+        factory = Factory(config)
+
+        shards, shard = config.get("shards"), config.get("shard")
+        if shard is not None and not shards:
+            raise ValueError("shard requires shards, the total number of shards")
+
+        if config.get("incremental"):
+            IncrementalBuilder(factory(), config["incremental"])(rows, config["output"], config.get("writer"))
+        elif shards:
+            sharded = ShardedBuilder(factory, shards, config.get("seed", 42))
+            if shard is not None:
+                sharded.shard(rows, config["output"], shard)
+            else:
+                sharded(rows, config["output"], config.get("writer"), config.get("workers"))
+        else:
+            total = config.get("total") or rows.count()
+            factory()(rows, total, config["output"], config.get("writer"), config.get("checkpoint"), config.get("resume", False))
+
+    def merge(self):
+        """
+        Merges shard files built on separate nodes into a single output file.
+        """
+
+        ShardedBuilder(None, self.config["shards"]).merge(self.config["output"], self.config.get("writer"))
+
+    def instructor(self):
+        """
+        Trains an instructor model.
+        """
+
+        config = self.config
+        Instructor()(
+            config["base"],
+            self.data(config["data"]),
+            config.get("task", "sequence-sequence"),
+            prompt=config.get("prompt"),
+            cache=config.get("cache"),
+            packing=config.get("packing", False),
+            lora=config.get("lora"),
+            quantize=config.get("quantize"),
+            output_dir=config["output"],
+            **config.get("args", {}),
+        )
+
+    def statement(self):
+        """
+        Trains a statement generation model.
+        """
+
+        config = self.config
+        StatementGenerator()(
+            config["base"],
+            self.data(config["data"]),
+            config.get("task", "sequence-sequence"),
+            prompt=config.get("prompt"),
+            cache=config.get("cache"),
+            lora=config.get("lora"),
+            quantize=config.get("quantize"),
+            output_dir=config["output"],
+            **config.get("args", {}),
+        )
+
+    def txtsql(self):
+        """
+        Trains a text to sql model.
+        """
+
+        TxtSQL(self.config.get("spec"))(self.config["input"], self.config["output"], self.config.get("workers"))
+
+    def bashsql(self):
+        """
+        Trains a text to bash model.
+        """
+
+        BashSQL(self.config.get("spec"))(self.config["input"], self.config["output"], self.config.get("workers"))
+
+    def data(self, config):
+        """
+        Loads training data. The configuration is either a file path, read as a stream, or a dict of Hugging Face load_dataset
+        arguments.
+
+        Args:
+            config: data configuration
+
+        Returns:
+            training data
+        """
+
+        if isinstance(config, dict):
+            # pylint: disable=C0415
+            from datasets import load_dataset
+
+            return load_dataset(**config)
+
+        return Reader(config)
+
+    def load(self, path):
+        """
+        Loads a JSON or YAML configuration file.
+
+        Args:
+            path: configuration file path
+
+        Returns:
+            configuration dict
+        """
+
+        with open(path, "r", encoding="utf-8") as f:
+            if path.lower().endswith((".yml", ".yaml")):
+                # pylint: disable=C0415
+                import yaml
+
+                return yaml.safe_load(f)
+
+            return json.load(f)
+
+
+def main(args=None):
+    """
+    Command line entry point.
+
+    Args:
+        args: optional list of command line arguments, defaults to sys.argv
+    """
+
+    parser = argparse.ArgumentParser(prog="txtinstruct", description="Datasets and models for instruction-tuning")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    # Dataset commands
+    build = commands.add_parser("build", help="build an instruction-tuning dataset")
+    build.add_argument("--shard", type=int, help="build a single shard, used to run shards on separate nodes")
+    build.add_argument("--shards", type=int, help="number of shards")
+    build.add_argument("--workers", type=int, help="number of local shard processes")
+    build.add_argument("--resume", action="store_true", help="resume from the last checkpoint")
+
+    merge = commands.add_parser("merge", help="merge shard files into a single output file")
+    merge.add_argument("--shards", type=int, help="number of shards")
+
+    # Training commands
+    commands.add_parser("train-instructor", help="train an instructor model")
+    commands.add_parser("train-statement", help="train a statement generation model")
+
+    for name in ["txtsql", "bashsql"]:
+        command = commands.add_parser(name, help=f"train a {name} model")
+        command.add_argument("--workers", type=int, help="number of processes used to expand queries")
+
+    # Common arguments
+    for command in commands.choices.values():
+        command.add_argument("config", help="JSON or YAML configuration file")
+        command.add_argument("--output", help="output path, overrides configuration")
+
+    CLI(parser.parse_args(args if args is not None else sys.argv[1:]))()
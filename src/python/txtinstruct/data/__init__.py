@@ -0,0 +1,21 @@
+"""
+Data imports
+"""
+
+from .asynchronous import AsyncDatasetBuilder
+from .batcher import Batcher
+from .builder import DatasetBuilder
+from .cache import Cache, CachedModel
+from .checkpoint import Checkpoint
+from .chunker import Chunker
+from .dedup import Deduplicate
+from .filters import CopiedStatement, EchoedQuestion, EmptyTarget, Filter, Filters, ScoreFilter
+from .incremental import IncrementalBuilder
+from .metrics import Metrics
+from .negatives import Negatives
+from .prefetch import Prefetch
+from .reader import ArrowReader, Reader
+from .remote import RemoteModel
+from .scheduler import Scheduler
+from .sharded import ShardedBuilder
+from .writer import ArrowWriter, JSONLWriter, JSONWriter, Writer, WriterFactory
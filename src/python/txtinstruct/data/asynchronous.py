@@ -0,0 +1,199 @@
+"""
+Asynchronous module
+"""
+
+import asyncio
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from .builder import DatasetBuilder
+
+
+class AsyncDatasetBuilder(DatasetBuilder):
+    """
+    Generates an instruction dataset with asyncio. Designed for models served by remote inference servers, see RemoteModel.
+
+    Target generation for multiple batches runs concurrently, which keeps many requests in flight. Statements for the next batch are
+    generated while targets for previous batches are pending. Outputs are written in input order and match DatasetBuilder output.
+
+    Models with an agenerate coroutine are called directly, batching and the generation cache are left to the server. Other models
+    run through the standard batching and cache in a worker thread, one call at a time.
+    """
+
+    def __init__(self, model, statement, window=4, **kwargs):
+        """
+        Creates a new AsyncDatasetBuilder.
+
+        Args:
+            model: target text generation model
+            statement: statement generation model
+            window: maximum number of batches with target generation in flight
+            kwargs: additional DatasetBuilder arguments
+        """
+
+        super().__init__(model, statement, **kwargs)
+
+        self.window = window
+
+        # Worker thread for synchronous models, local pipelines aren't safe to call from multiple threads
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    def __call__(self, rows, total, output, writer=None, checkpoint=None, resume=False):
+        """
+        Build a dataset with input rows. See DatasetBuilder for details on checkpointing and resuming. This method starts an event
+        loop, use run when an event loop is already running, for example in a Jupyter notebook.
+
+        Args:
+            rows: iterable of {id, text}
+            total: total number of rows expected
+            output: output file path
+            writer: optional output format (json, jsonl or jsonl.gz), inferred from output path when not provided
+            checkpoint: optional checkpoint file path, defaults to output path + .checkpoint
+            resume: resumes from the last checkpoint if True
+        """
+
+        # asyncio.run can't be called from a running event loop, for example in a Jupyter notebook
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.run(rows, total, output, writer, checkpoint, resume))
+
+        raise RuntimeError("An event loop is already running, use await builder.run(rows, total, output, writer, checkpoint, resume) instead")
+
+    async def run(self, rows, total, output, writer, checkpoint, resume):
+        """
+        Builds a dataset on the running event loop. Same arguments as __call__.
+
+        Args:
+            rows: iterable of {id, text}
+            total: total number of rows expected
+            output: output file path
+            writer: optional output format
+            checkpoint: optional checkpoint file path
+            resume: resumes from the last checkpoint if True
+        """
+
+        writer, checkpoint, index, batches = self.start(rows, total, output, writer, checkpoint, resume)
+
+        # Batches with target generation in flight, in input order
+        pending = deque()
+
+        try:
+            for batch in batches:
+                rows, statements = await self.aprepare(batch)
+
+                # Random sampling runs in input order, target generation runs concurrently
+                queue, prompts, negatives = self.tprepare(rows, statements) if rows else ([], [], [])
+
+                # Sampling state for this batch's checkpoint, later batches sample before this batch is written
+                state = self.state()
+
+                pending.append((batch, rows, queue, negatives, state, asyncio.ensure_future(self.atargets(len(rows), prompts))))
+
+                # Write completed batches and wait when the window is full
+                while pending and (len(pending) > self.window or pending[0][-1].done()):
+                    index = await self.complete(pending.popleft(), index, writer, checkpoint)
+
+            # Write remaining batches
+            while pending:
+                index = await self.complete(pending.popleft(), index, writer, checkpoint)
+        except BaseException:
+            # Cancel pending requests on errors
+            for *_, future in pending:
+                future.cancel()
+
+            writer.abort()
+            raise
+
+        writer.close()
+
+        # Save run metrics
+        if self.metrics:
+            self.metrics.save()
+
+    async def complete(self, item, index, writer, checkpoint):
+        """
+        Waits for targets for a batch and writes the outputs.
+
+        Args:
+            item: (batch, rows, queue, negatives, sampling state, targets future)
+            index: number of rows processed before this batch
+            writer: output writer
+            checkpoint: Checkpoint instance
+
+        Returns:
+            number of rows processed including this batch
+        """
+
+        batch, rows, queue, negatives, state, future = item
+        targets = await future
+
+        return self.write(batch, self.outputs(rows, queue, targets, negatives) if rows else [], index, writer, checkpoint, state)
+
+    async def aprepare(self, rows):
+        """
+        Selects contexts from a batch of rows and generates statements for each context.
+
+        Args:
+            rows: batch of rows
+
+        Returns:
+            (rows, statements)
+        """
+
+        rows = self.contexts(rows)
+
+        with self.measure("prompts", len(rows)):
+            prompts = self.sprompt.batch(context=[row["text"] for row in rows])
+
+        with self.measure("statements", len(rows)) as stage:
+            statements = self.truncate(await self.agenerate(self.statement, self.sbatcher, prompts, self.smaxtokens, self.sstop), self.sstop)
+            stage["tokens"] = self.tokens(prompts, statements)
+
+        return rows, statements
+
+    async def atargets(self, rows, prompts):
+        """
+        Generates target text for a batch of prompts.
+
+        Args:
+            rows: number of rows in batch
+            prompts: target prompts
+
+        Returns:
+            generated targets
+        """
+
+        with self.measure("targets", rows) as stage:
+            targets = self.truncate(await self.agenerate(self.model, self.batcher, prompts, self.maxtokens, self.stop), self.stop)
+            stage["tokens"] = self.tokens(prompts, targets)
+
+        return targets
+
+    async def agenerate(self, model, batcher, prompts, maxtokens, stop):
+        """
+        Runs text generation for a list of prompts.
+
+        Args:
+            model: text generation model
+            batcher: batched, and optionally cached, model used for models without asynchronous support
+            prompts: list of prompts
+            maxtokens: maximum number of new tokens or None
+            stop: list of stop strings or None
+
+        Returns:
+            list of generated texts
+        """
+
+        if not prompts:
+            return []
+
+        if hasattr(model, "agenerate"):
+            return await model.agenerate(prompts, **self.budget(model, maxtokens, stop))
+
+        # Run synchronous models in a worker thread to keep the event loop responsive
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, partial(batcher, prompts, truncation=True, **self.budget(model, maxtokens, stop))
+        )
@@ -0,0 +1,117 @@
+"""
+Batcher module
+"""
+
+
+class Batcher:
+    """
+    Runs model inference over a list of inputs. By default, inputs are passed to the model with a fixed batch size. When a token
+    budget is set, inputs are sorted by token length and packed into batches where the batch size times the longest input in the
+    batch stays within the budget. This reduces padding when input lengths vary. Outputs are always returned in input order.
+    """
+
+    def __init__(self, model, batchsize=None, tokens=None):
+        """
+        Creates a new Batcher.
+
+        Args:
+            model: text generation model
+            batchsize: model batch size, defaults to the number of inputs
+            tokens: optional token budget per batch, enables adaptive batching
+        """
+
+        self.model = model
+        self.batchsize = batchsize
+        self.tokens = tokens
+
+        # Tokenizer used to measure input lengths
+        self.tokenizer = self.gettokenizer(model) if tokens else None
+
+    def __call__(self, inputs, **kwargs):
+        """
+        Runs model inference.
+
+        Args:
+            inputs: list of inputs
+            kwargs: additional model arguments
+
+        Returns:
+            list of outputs
+        """
+
+        if not inputs:
+            return []
+
+        # Fixed size batching
+        if not self.tokens:
+            return self.model(inputs, batch_size=self.batchsize if self.batchsize else len(inputs), **kwargs)
+
+        # Adaptive batching
+        outputs = [None] * len(inputs)
+        for batch in self.batches(self.lengths(inputs)):
+            for x, output in zip(batch, self.model([inputs[x] for x in batch], batch_size=len(batch), **kwargs)):
+                outputs[x] = output
+
+        return outputs
+
+    def batches(self, lengths):
+        """
+        Packs inputs into batches using the token budget.
+
+        Args:
+            lengths: list of input token lengths
+
+        Returns:
+            list of batches, each batch is a list of input indices
+        """
+
+        batches, batch = [], []
+        for x in sorted(range(len(lengths)), key=lambda x: lengths[x]):
+            # Inputs are sorted by length, the current input is the longest in the batch
+            if batch and (len(batch) + 1) * lengths[x] > self.tokens:
+                batches.append(batch)
+                batch = []
+
+            batch.append(x)
+
+        if batch:
+            batches.append(batch)
+
+        return batches
+
+    def lengths(self, inputs):
+        """
+        Calculates input token lengths. Falls back to the number of whitespace separated words when a tokenizer isn't available.
+
+        Args:
+            inputs: list of inputs
+
+        Returns:
+            list of token lengths
+        """
+
+        if not self.tokenizer:
+            return [len(text.split()) for text in inputs]
+
+        # Inputs are truncated to the maximum model length
+        maxlength = self.tokenizer.model_max_length
+
+        # Tokenizer is set at this point, pylint infers the None default
+        # pylint: disable=E1102
+        return [min(len(ids), maxlength) for ids in self.tokenizer(inputs)["input_ids"]]
+
+    def gettokenizer(self, model):
+        """
+        Gets the tokenizer for a model, if available.
+
+        Args:
+            model: text generation model
+
+        Returns:
+            tokenizer or None
+        """
+
+        if hasattr(model, "pipeline"):
+            model = model.pipeline
+
+        return getattr(model, "tokenizer", None)
@@ -0,0 +1,682 @@
+"""
+Builder module
+"""
+
+import json
+import random
+
+from contextlib import nullcontext
+from itertools import islice
+
+from tqdm import tqdm
+
+from ..prompt import Prompt
+from .batcher import Batcher
+from .cache import Cache, CachedModel
+from .checkpoint import Checkpoint
+from .chunker import Chunker
+from .dedup import Deduplicate
+from .filters import Filters
+from .negatives import Negatives
+from .prefetch import Prefetch
+from .remote import RemoteModel
+from .scheduler import Scheduler
+from .writer import WriterFactory
+
+
+# pylint: disable=R0904
+class DatasetBuilder:
+    """
+    Generates an instruction dataset using statement generation and text generation models.
+    """
+
+    # Target for unanswerable statements
+    UNANSWERABLE = "I don't have data on that"
+
+    # pylint: disable=R0913
+    def __init__(
+        self,
+        model,
+        statement,
+        templates=None,
+        prompt=None,
+        sprompt=None,
+        pipeline=False,
+        batch=64,
+        batchsize=8,
+        sbatchsize=None,
+        tokens=None,
+        cache=None,
+        dedup=None,
+        negatives=None,
+        metrics=None,
+        chunker=None,
+        filters=None,
+        ids=False,
+        maxtokens=None,
+        smaxtokens=None,
+        stop=None,
+        sstop=None,
+    ):
+        """
+        Creates a new DatasetBuilder.
+
+        Args:
+            model: target text generation model
+            statement: statement generation model
+            templates: optional list of custom statement templates
+            prompt: optional model prompt
+            sprompt: optional custom statement prompt
+            pipeline: if True, statements for the next batch are generated in a background thread while targets are generated for
+                      the current batch, both models are called concurrently and must be safe to call from separate threads. Falls
+                      back to serial generation when both models share a pipeline, model or tokenizer.
+            batch: number of input rows per generation batch
+            batchsize: target model batch size
+            sbatchsize: statement model batch size, defaults to batch
+            tokens: optional token budget per model batch, enables adaptive batching by input length
+            cache: optional generation cache, either a Cache instance or a cache database path
+            dedup: optional Deduplicate instance or True for defaults, removes near-duplicate rows before generation and duplicate
+                   statements after generation
+            negatives: optional Negatives instance used to sample unanswerable statements, defaults to sampling within each batch
+            metrics: optional Metrics instance that collects per-stage throughput and latency
+            chunker: optional Chunker instance or True for defaults, splits long rows into overlapping chunks before statement
+                     generation, each chunk becomes a separate context
+            filters: optional Filters instance, list of Filter instances or True for default heuristics, drops low quality generated
+                     statements before output
+            ids: adds the input row id to each output row if True
+            maxtokens: optional maximum number of new tokens generated per target
+            smaxtokens: optional maximum number of new tokens generated per statement
+            stop: optional list of target stop strings, targets are truncated after the first stop string
+            sstop: optional list of statement stop strings, statements are truncated after the first stop string
+        """
+
+        # Target text generation model
+        self.model = model
+
+        # Statement generation model
+        self.statement = statement
+
+        # Target text prompt
+        self.prompt = Prompt(prompt if prompt else self.defaultprompt(self.model), ["statement", "context"])
+
+        # Statement prompt
+        self.sprompt = Prompt(sprompt if sprompt else self.defaultsprompt(self.statement), ["context"])
+
+        # Statement templates
+        self.templates = [Prompt(template, ["text"]) for template in templates] if templates else None
+
+        # Pipeline statement and target generation, shared pipelines and tokenizers aren't safe to call concurrently
+        self.pipeline = pipeline and not self.shared()
+
+        # Generation batch size
+        self.batch = batch
+
+        # Model inference batching
+        self.batcher = Batcher(self.model, batchsize, tokens)
+        # Statement batches default to the generation batch size, chunked rows can produce many more inputs than rows
+        self.sbatcher = Batcher(self.statement, sbatchsize if sbatchsize else batch, tokens)
+
+        # Generation cache, model outputs are looked up in the cache before running inference
+        self.cache = Cache(cache) if isinstance(cache, str) else cache
+        if self.cache:
+            self.batcher = CachedModel(self.batcher, self.cache, self.identity(self.model))
+            self.sbatcher = CachedModel(self.sbatcher, self.cache, self.identity(self.statement))
+
+        # Context chunking, defaults to measuring chunks with the statement model tokenizer
+        if chunker is True:
+            statement = self.statement.pipeline if hasattr(self.statement, "pipeline") else self.statement
+            chunker = Chunker(getattr(statement, "tokenizer", None))
+
+        self.chunker = chunker
+
+        # Quality filters
+        self.filters = Filters() if filters is True else Filters(filters) if isinstance(filters, list) else filters
+
+        # Add input row ids to outputs
+        self.ids = ids
+
+        # Generation budgets per stage
+        self.maxtokens, self.smaxtokens = maxtokens, smaxtokens
+        self.stop, self.sstop = stop, sstop
+
+        # Near-duplicate detection
+        self.dedup = Deduplicate() if dedup is True else dedup
+
+        # Unanswerable statement sampling
+        self.negatives = negatives if negatives else Negatives()
+
+        # Per-stage metrics
+        self.metrics = metrics
+
+        # Set random seed generated data is deterministic
+        random.seed(42)
+
+    def __call__(self, rows, total, output, writer=None, checkpoint=None, resume=False):
+        """
+        Build a dataset with input rows.
+
+        Progress is checkpointed after each batch for output formats that support resuming (jsonl and jsonl.gz). When resume is
+        True, rows already processed are skipped and the random state is restored, so the output matches an uninterrupted run.
+        Resuming isn't supported with near-duplicate detection, the dedup index isn't checkpointed.
+
+        Args:
+            rows: iterable of {id, text}
+            total: total number of rows expected
+            output: output file path
+            writer: optional output format (json, jsonl or jsonl.gz), inferred from output path when not provided
+            checkpoint: optional checkpoint file path, defaults to output path + .checkpoint
+            resume: resumes from the last checkpoint if True
+        """
+
+        writer, checkpoint, index, batches = self.start(rows, total, output, writer, checkpoint, resume)
+        try:
+            # Generate statements for each batch, optionally in a background thread
+            batches = Prefetch(batches, self.prepare) if self.pipeline else ((batch, self.prepare(batch)) for batch in batches)
+
+            # Generate targets and write output
+            for batch, (contexts, statements) in batches:
+                index = self.write(batch, self.tgenerate(contexts, statements), index, writer, checkpoint)
+        except BaseException:
+            writer.abort()
+            raise
+
+        writer.close()
+
+        # Save run metrics
+        if self.metrics:
+            self.metrics.save()
+
+    def start(self, rows, total, output, writer, checkpoint, resume):
+        """
+        Opens the output writer, loads the last checkpoint when resuming and splits the remaining input rows into batches.
+
+        Args:
+            rows: iterable of {id, text}
+            total: total number of rows expected
+            output: output file path
+            writer: optional output format
+            checkpoint: optional checkpoint file path
+            resume: resumes from the last checkpoint if True
+
+        Returns:
+            (writer, checkpoint, number of rows already processed, batches)
+        """
+
+        # Rows seen before the checkpoint aren't in a new dedup index, resuming would admit their duplicates
+        if resume and self.dedup:
+            raise ValueError("Resuming isn't supported with near-duplicate detection")
+
+        # Create output writer and checkpoint
+        writer = WriterFactory.create(output, writer)
+        checkpoint = Checkpoint(checkpoint if checkpoint else f"{output}.checkpoint")
+
+        # Load last checkpoint when resuming
+        state = checkpoint.load() if resume else None
+        index = state["index"] if state else 0
+
+        if state and state.get("negatives"):
+            self.negatives.restore(state["negatives"])
+
+        writer.open(state["offset"] if state else None)
+
+        # Skip rows processed in a previous run
+        batches = self.batches(tqdm(islice(rows, index, None), total=total, initial=index))
+
+        return writer, checkpoint, index, batches
+
+    def batches(self, rows):
+        """
+        Splits rows into batches.
+
+        Args:
+            rows: iterable of rows
+
+        Returns:
+            batches of rows
+        """
+
+        batch = []
+        for row in rows:
+            batch.append(row)
+
+            if len(batch) == self.batch:
+                yield batch
+                batch = []
+
+        # Last batch
+        if batch:
+            yield batch
+
+    def write(self, batch, outputs, index, writer, checkpoint, state=None):
+        """
+        Writes the outputs for a batch of rows and saves a checkpoint.
+
+        Args:
+            batch: batch of input rows
+            outputs: generated outputs for batch
+            index: number of rows processed before this batch
+            writer: output writer
+            checkpoint: Checkpoint instance
+            state: sampling state after this batch, see state(), defaults to the current state
+
+        Returns:
+            number of rows processed including this batch
+        """
+
+        index += len(batch)
+
+        with self.measure("serialization", len(outputs)):
+            writer.write(outputs)
+
+            # Checkpoint progress when the writer supports resuming
+            offset = writer.offset()
+            if offset is not None:
+                checkpoint.save(index, batch[-1]["id"], offset, *(state if state else self.state()))
+
+        return index
+
+    def state(self):
+        """
+        Gets the sampling state saved with checkpoints.
+
+        Returns:
+            (random state, negative sampling state)
+        """
+
+        return random.getstate(), self.negatives.state()
+
+    def generate(self, rows):
+        """
+        Generates targets for a batch of input rows.
+
+        Args:
+            rows: batch of rows
+
+        Returns:
+            outputs
+        """
+
+        return self.tgenerate(*self.prepare(rows))
+
+    def prepare(self, rows):
+        """
+        Selects contexts from a batch of rows and generates statements for each context.
+
+        Args:
+            rows: batch of rows
+
+        Returns:
+            (rows, statements)
+        """
+
+        rows = self.contexts(rows)
+        return rows, self.sgenerate(rows)
+
+    def contexts(self, rows):
+        """
+        Splits long rows into chunks and removes near-duplicate rows, when enabled. Rows are chunked within each batch, which keeps
+        checkpoints based on input rows.
+
+        Args:
+            rows: batch of rows
+
+        Returns:
+            rows
+        """
+
+        if self.chunker:
+            with self.measure("chunking", len(rows)):
+                rows = self.chunker(rows)
+
+        if self.dedup:
+            with self.measure("dedup", len(rows)):
+                rows = self.dedup(rows)
+
+        return rows
+
+    def sgenerate(self, rows):
+        """
+        Generates statements for a batch of input rows. This method doesn't use the random number generator, which allows it to run
+        concurrently with target generation without changing the output.
+
+        Args:
+            rows: batch of rows
+
+        Returns:
+            generated statements
+        """
+
+        with self.measure("prompts", len(rows)):
+            prompts = self.sprompt.batch(context=[row["text"] for row in rows])
+
+        with self.measure("statements", len(rows)) as stage:
+            statements = self.truncate(
+                self.sbatcher(prompts, truncation=True, **self.budget(self.statement, self.smaxtokens, self.sstop)), self.sstop
+            )
+            stage["tokens"] = self.tokens(prompts, statements)
+
+        return statements
+
+    def tgenerate(self, rows, statements):
+        """
+        Generates targets for a batch of input rows and statements.
+
+        Args:
+            rows: batch of rows
+            statements: generated statements
+
+        Returns:
+            outputs
+        """
+
+        if not rows:
+            return []
+
+        queue, prompts, negatives = self.tprepare(rows, statements)
+
+        # Generate target text from prompts
+        with self.measure("targets", len(rows)) as stage:
+            targets = self.truncate(self.batcher(prompts, truncation=True, **self.budget(self.model, self.maxtokens, self.stop)), self.stop)
+            stage["tokens"] = self.tokens(prompts, targets)
+
+        return self.outputs(rows, queue, targets, negatives)
+
+    def tprepare(self, rows, statements):
+        """
+        Creates target prompts and samples unanswerable statements for a batch of rows. All random sampling for a batch happens here,
+        before target generation. This keeps output deterministic when targets for multiple batches are generated concurrently.
+
+        Args:
+            rows: batch of rows
+            statements: generated statements
+
+        Returns:
+            (statements per row, target prompts, unanswerable statements)
+        """
+
+        # Split into ids and texts
+        ids = [row["id"] for row in rows]
+        texts = [row["text"] for row in rows]
+
+        # Generate template statements
+        with self.measure("templates", len(rows)):
+            templates = self.template(ids) if self.templates else []
+
+        # Create prompts
+        with self.measure("prompts", len(rows)):
+            prompts = self.prompt.batch(statement=statements, context=texts)
+
+            # Interleave template statement prompts
+            if templates:
+                prompts = [prompt for pair in zip(prompts, self.prompt.batch(statement=templates, context=texts)) for prompt in pair]
+
+            # Store all generated statements as single row
+            queue = [[statement, templates[x]] if templates else [statement] for x, statement in enumerate(statements)]
+
+        # Sample unanswerable statements
+        negatives = self.negatives(ids, texts, queue)
+
+        return queue, prompts, negatives
+
+    def outputs(self, rows, queue, targets, negatives):
+        """
+        Builds output rows from generated targets.
+
+        Args:
+            rows: batch of rows
+            queue: statements per row
+            targets: generated targets, one per statement
+            negatives: unanswerable statement per row
+
+        Returns:
+            outputs
+        """
+
+        # Answer index
+        index, outputs = 0, []
+        for x, row in enumerate(rows):
+            output = {"id": row["id"], "context": row["text"], "statements": []} if self.ids else {"context": row["text"], "statements": []}
+            for question in queue[x]:
+                output["statements"].append({"source": question, "target": targets[index]})
+
+                index += 1
+
+            # Add unanswerable statement
+            if negatives[x]:
+                output["statements"].append({"source": negatives[x], "target": DatasetBuilder.UNANSWERABLE})
+
+            outputs.append(output)
+
+        # Remove duplicate statements
+        outputs = self.dedup.statements(outputs) if self.dedup else outputs
+
+        # Remove low quality statements
+        if self.filters:
+            with self.measure("filters", len(outputs)):
+                outputs, rejected = self.filters(outputs)
+                if self.metrics:
+                    self.metrics.reject(rejected)
+
+        return outputs
+
+    def measure(self, name, rows):
+        """
+        Measures a stage when metrics are enabled.
+
+        Args:
+            name: stage name
+            rows: number of rows
+
+        Returns:
+            context manager that yields a dict of batch statistics
+        """
+
+        return self.metrics.stage(name, rows) if self.metrics else nullcontext({})
+
+    def tokens(self, inputs, outputs):
+        """
+        Counts model input and output tokens when metrics are enabled.
+
+        Args:
+            inputs: list of model inputs
+            outputs: list of model outputs
+
+        Returns:
+            number of tokens
+        """
+
+        return self.metrics.count(inputs, outputs) if self.metrics else 0
+
+    def budget(self, model, maxtokens, stop):
+        """
+        Gets model generation arguments for a stage budget.
+
+        Args:
+            model: text generation model
+            maxtokens: maximum number of new tokens or None
+            stop: list of stop strings or None
+
+        Returns:
+            generation arguments
+        """
+
+        arguments = {"max_new_tokens": maxtokens} if maxtokens else {}
+
+        # Scheduler and remote servers stop generating once a stop string is generated, outputs are still truncated after generation
+        if stop and isinstance(model, (Scheduler, RemoteModel)):
+            arguments["stop"] = stop
+
+        return arguments
+
+    def truncate(self, texts, stop):
+        """
+        Truncates generated texts after the first stop string. Stop strings are kept, which keeps refusals such as the unanswerable
+        target intact.
+
+        Args:
+            texts: list of generated texts
+            stop: list of stop strings or None
+
+        Returns:
+            truncated texts
+        """
+
+        if not stop:
+            return texts
+
+        results = []
+        for text in texts:
+            matches = [(text.find(x), x) for x in stop if x in text]
+            if matches:
+                start, match = min(matches)
+                text = text[: start + len(match)]
+
+            results.append(text)
+
+        return results
+
+    def template(self, ids):
+        """
+        Generates template statements using ids as the input text. This method assumes each id is a text identifier.
+
+        Args:
+            ids: list of ids
+
+        Returns:
+            generated template statements
+        """
+
+        # Generate statements and run
+        statements = []
+        for uid in ids:
+            # Get query template
+            template = random.choice(self.templates)
+
+            # Create statement
+            statements.append(template(text=uid))
+
+        return statements
+
+    def defaultsprompt(self, model):
+        """
+        Default statement prompt when otherwise not provided
+
+        Args:
+            model: statement generation model
+
+        Returns:
+            default statement prompt
+        """
+
+        prompt = """Generate a question using the context below.
+    ### Context:
+    {context}
+    """
+
+        # Infer model task
+        task = self.infertask(model)
+
+        if task == "language-generation":
+            prompt += "\n### Answer:\n"
+
+        return prompt
+
+    def defaultprompt(self, model):
+        """
+        Default target text generation prompt.
+
+        Args:
+            model: target text generation model
+
+        Returns:
+            default target text generation prompt
+        """
+
+        # Infer model task
+        task = self.infertask(model)
+
+        template = "Answer the following question using only the context below. Give a detailed answer. "
+        template += "Say 'I don't have data on that' when the question can't be answered.\n"
+        template += "Question: {statement}\n"
+        template += "Context: {context}"
+        template += "\nAnswer: " if task == "language-generation" else ""
+        return template
+
+    def shared(self):
+        """
+        Checks if the target and statement models share a pipeline, model or tokenizer.
+
+        Returns:
+            True if any components are shared
+        """
+
+        components = []
+        for model in [self.model, self.statement]:
+            model = model.pipeline if hasattr(model, "pipeline") else model
+            components.append([model, getattr(model, "model", None), getattr(model, "tokenizer", None)])
+
+        return any(x is not None and x is y for x, y in zip(*components))
+
+    def infertask(self, model):
+        """
+        Infer the model task (language-generation or sequence-sequence) using model configuration.
+
+        Args:
+            model: input model
+
+        Returns:
+            model task
+        """
+
+        # Remote models don't expose a configuration
+        if isinstance(model, RemoteModel):
+            return model.task
+
+        # Scheduler only supports decoder-only models
+        if isinstance(model, Scheduler):
+            return "language-generation"
+
+        # Extract pipeline model
+        if hasattr(model, "pipeline"):
+            model = model.pipeline.model
+        elif hasattr(model, "model"):
+            model = model.model
+
+        architecture = model.config.architectures[0] if model.config.architectures else None
+
+        if any(x for x in ["LMHead", "CausalLM"] if x in architecture):
+            return "language-generation"
+
+        return "sequence-sequence"
+
+    def identity(self, model):
+        """
+        Gets the model identity used in generation cache keys and incremental build fingerprints. Remote model identities include
+        the generation parameters sent with each request, Scheduler identities include the default token budget and stop strings.
+
+        Args:
+            model: input model
+
+        Returns:
+            model identity
+        """
+
+        if isinstance(model, RemoteModel):
+            # Generation parameters are only added when set, which keeps existing cache keys
+            parameters = f"#{json.dumps(model.kwargs, sort_keys=True)}" if model.kwargs else ""
+            return f"{model.url}#{model.model}{parameters}"
+
+        # Scheduler defaults change outputs
+        defaults = f"#{json.dumps([model.maxtokens, model.stop])}" if isinstance(model, Scheduler) else ""
+
+        # Extract pipeline model
+        if hasattr(model, "pipeline"):
+            model = model.pipeline.model
+        elif hasattr(model, "model"):
+            model = model.model
+
+        name = getattr(model, "name_or_path", None) or getattr(model.config, "_name_or_path", None)
+        if not name:
+            raise ValueError("Unable to determine model identity for generation cache")
+
+        return f"{name}{defaults}"
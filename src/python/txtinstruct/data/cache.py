@@ -0,0 +1,184 @@
+"""
+Cache module
+"""
+
+import hashlib
+import json
+import sqlite3
+
+from threading import Lock
+
+
+class Cache:
+    """
+    SQLite-backed generation cache. Entries are keyed on a hash of the model identity, input text and generation arguments. When a
+    maximum size is set, the least recently used entries are evicted.
+    """
+
+    def __init__(self, path, maxsize=None):
+        """
+        Creates a new Cache.
+
+        Args:
+            path: cache database path
+            maxsize: optional maximum number of cached entries
+        """
+
+        self.maxsize = maxsize
+
+        # Hit/miss counters
+        self.hits, self.misses = 0, 0
+
+        # Connection is shared across threads, serialize access with a lock
+        self.lock = Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False, timeout=60)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT, accessed INTEGER)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache(accessed)")
+        self.connection.commit()
+
+        # Logical clock used to track access order
+        self.clock = self.connection.execute("SELECT COALESCE(MAX(accessed), 0) FROM cache").fetchone()[0]
+
+    def get(self, keys):
+        """
+        Looks up cached values.
+
+        Args:
+            keys: list of keys
+
+        Returns:
+            {key: value} for keys found in the cache
+        """
+
+        results = {}
+        with self.lock:
+            # Limit the number of SQL parameters per statement
+            for x in range(0, len(keys), 500):
+                batch = keys[x : x + 500]
+                query = f"SELECT key, value FROM cache WHERE key IN ({','.join('?' * len(batch))})"
+                for key, value in self.connection.execute(query, batch):
+                    results[key] = json.loads(value)
+
+            # Update access time for hits
+            if results:
+                self.clock += 1
+                self.connection.executemany("UPDATE cache SET accessed = ? WHERE key = ?", [(self.clock, key) for key in results])
+                self.connection.commit()
+
+            self.hits += sum(1 for key in keys if key in results)
+            self.misses += sum(1 for key in keys if key not in results)
+
+        return results
+
+    def put(self, items):
+        """
+        Adds values to the cache and evicts the least recently used entries when the cache is full.
+
+        Args:
+            items: list of (key, value)
+        """
+
+        with self.lock:
+            self.clock += 1
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO cache (key, value, accessed) VALUES (?, ?, ?)", [(key, json.dumps(value), self.clock) for key, value in items]
+            )
+
+            if self.maxsize:
+                size = self.connection.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+                if size > self.maxsize:
+                    self.connection.execute(
+                        "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed LIMIT ?)", (size - self.maxsize,)
+                    )
+
+            self.connection.commit()
+
+    def stats(self):
+        """
+        Gets cache statistics.
+
+        Returns:
+            {hits, misses, size}
+        """
+
+        with self.lock:
+            size = self.connection.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+        return {"hits": self.hits, "misses": self.misses, "size": size}
+
+    def close(self):
+        """
+        Closes the cache database.
+        """
+
+        with self.lock:
+            self.connection.close()
+
+
+class CachedModel:
+    """
+    Wraps a text generation model with a Cache. Only inputs not found in the cache are sent to the model.
+    """
+
+    def __init__(self, model, cache, name):
+        """
+        Creates a new CachedModel.
+
+        Args:
+            model: text generation model
+            cache: Cache instance
+            name: model identity used in cache keys
+        """
+
+        self.model = model
+        self.cache = cache
+        self.name = name
+
+    def __call__(self, inputs, **kwargs):
+        """
+        Runs model inference, reading from and writing to the cache.
+
+        Args:
+            inputs: list of inputs
+            kwargs: additional model arguments
+
+        Returns:
+            list of outputs
+        """
+
+        # Batch size doesn't change generated outputs
+        arguments = {key: value for key, value in kwargs.items() if key != "batch_size"}
+
+        keys = [self.key(text, arguments) for text in inputs]
+        results = self.cache.get(keys)
+
+        # Run inference for unique cache misses
+        missing = {}
+        for x, key in enumerate(keys):
+            if key not in results and key not in missing:
+                missing[key] = inputs[x]
+
+        if missing:
+            outputs = self.model(list(missing.values()), **kwargs)
+            items = list(zip(missing.keys(), outputs))
+
+            self.cache.put(items)
+            results.update(items)
+
+        return [results[key] for key in keys]
+
+    def key(self, text, arguments):
+        """
+        Builds a cache key.
+
+        Args:
+            text: input text
+            arguments: generation arguments
+
+        Returns:
+            cache key
+        """
+
+        data = json.dumps([self.name, text, arguments], sort_keys=True, default=str)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
@@ -0,0 +1,70 @@
+"""
+Checkpoint module
+"""
+
+import json
+import os
+import random
+
+
+class Checkpoint:
+    """
+    Stores DatasetBuilder progress. A checkpoint records the number of input rows processed, the last row id, the output file
+    offset, the random number generator state and the negative sampling state. This allows an interrupted build to resume with the
+    same output.
+    """
+
+    def __init__(self, path):
+        """
+        Creates a new Checkpoint.
+
+        Args:
+            path: checkpoint file path
+        """
+
+        self.path = path
+
+    def load(self):
+        """
+        Loads checkpoint data and restores the random state.
+
+        Returns:
+            checkpoint data if the checkpoint exists, otherwise None
+        """
+
+        if not os.path.exists(self.path):
+            return None
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        # Restore random state
+        version, state, gauss = data["random"]
+        random.setstate((version, tuple(state), gauss))
+
+        return data
+
+    def save(self, index, uid, offset, state=None, negatives=None):
+        """
+        Saves checkpoint data. Checkpoints are written to a temporary file and then moved into place, so a checkpoint is never
+        partially written.
+
+        Args:
+            index: number of input rows processed
+            uid: last processed row id
+            offset: output file offset
+            state: random state after the last processed row, defaults to the current random state
+            negatives: optional negative sampling state
+        """
+
+        data = {"index": index, "id": uid, "offset": offset, "random": state if state else random.getstate()}
+        if negatives:
+            data["negatives"] = negatives
+
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(tmp, self.path)
@@ -0,0 +1,108 @@
+"""
+Chunker module
+"""
+
+import re
+
+
+class Chunker:
+    """
+    Splits long texts into overlapping chunks with a token budget. Each chunk becomes a separate row with the same id and other fields
+    as the input row. Chunk boundaries are found with a tokenizer's offset mapping, which keeps chunk text identical to the input text
+    including whitespace. Tokenizers without offset mapping support fall back to splitting on whitespace.
+    """
+
+    def __init__(self, tokenizer=None, size=None, overlap=32):
+        """
+        Creates a new Chunker.
+
+        Args:
+            tokenizer: optional tokenizer used to measure chunks, should be the tokenizer of the model that reads the chunks
+            size: maximum number of tokens per chunk, defaults to the tokenizer maximum length (up to 512) less 128 tokens reserved
+                  for prompt text and statements, 256 without a tokenizer
+            overlap: number of tokens shared by consecutive chunks
+        """
+
+        self.tokenizer = tokenizer
+        self.size = size if size else self.defaultsize(tokenizer)
+        self.overlap = overlap
+
+        if self.overlap >= self.size:
+            raise ValueError("overlap must be less than chunk size")
+
+    def __call__(self, rows):
+        """
+        Splits rows into chunks. Rows that fit within the token budget are returned unchanged.
+
+        Args:
+            rows: list of {id, text}
+
+        Returns:
+            list of rows
+        """
+
+        if not rows:
+            return rows
+
+        chunks = []
+        for row, offsets in zip(rows, self.offsets([row["text"] for row in rows])):
+            if len(offsets) <= self.size:
+                chunks.append(row)
+            else:
+                chunks.extend({**row, "text": text} for text in self.split(row["text"], offsets))
+
+        return chunks
+
+    def split(self, text, offsets):
+        """
+        Splits text into overlapping chunks.
+
+        Args:
+            text: input text
+            offsets: list of (start, end) character offsets per token
+
+        Returns:
+            list of chunk texts
+        """
+
+        chunks, start = [], 0
+        while True:
+            end = min(start + self.size, len(offsets))
+            chunks.append(text[offsets[start][0] : offsets[end - 1][1]])
+
+            if end == len(offsets):
+                return chunks
+
+            start = end - self.overlap
+
+    def offsets(self, texts):
+        """
+        Gets token character offsets for a batch of texts.
+
+        Args:
+            texts: list of texts
+
+        Returns:
+            list of (start, end) offsets per text
+        """
+
+        # Offset mapping is only supported by fast tokenizers
+        if getattr(self.tokenizer, "is_fast", False):
+            mappings = self.tokenizer(texts, add_special_tokens=False, return_offsets_mapping=True, verbose=False)["offset_mapping"]
+            return [[(start, end) for start, end in mapping if end > start] for mapping in mappings]
+
+        return [[match.span() for match in re.finditer(r"\S+", text)] for text in texts]
+
+    def defaultsize(self, tokenizer):
+        """
+        Gets the default chunk size for a tokenizer.
+
+        Args:
+            tokenizer: tokenizer or None
+
+        Returns:
+            chunk size
+        """
+
+        maxlength = getattr(tokenizer, "model_max_length", None) if getattr(tokenizer, "is_fast", False) else None
+        return min(maxlength, 512) - 128 if maxlength else 256
@@ -0,0 +1,292 @@
+"""
+Dedup module
+"""
+
+import re
+import zlib
+
+import numpy as np
+
+
+class Deduplicate:
+    """
+    Near-duplicate detection using MinHash signatures and locality sensitive hashing (LSH). MinHash signatures for a batch of texts are
+    computed in bulk with NumPy. Texts are indexed as they are seen, so duplicates are detected across all batches.
+
+    New texts are indexed in memory. Once a full segment of texts is indexed, the segment is compacted into NumPy arrays: uint32
+    signatures along with 64-bit LSH band keys and signature positions sorted by key. Segments are merged as they accumulate, which
+    keeps lookups to a few binary searches per batch. Compacted texts take up 4 bytes per permutation plus 12 bytes per band.
+    """
+
+    # Mersenne prime used for universal hashing
+    PRIME = (1 << 61) - 1
+
+    # pylint: disable=R0913
+    def __init__(self, threshold=0.8, permutations=128, bands=32, ngrams=3, seed=42, capacity=None, segment=4096):
+        """
+        Creates a new Deduplicate instance.
+
+        Args:
+            threshold: minimum estimated Jaccard similarity for two texts to be considered duplicates
+            permutations: number of MinHash permutations
+            bands: number of LSH bands, must evenly divide permutations
+            ngrams: word n-gram size used for shingles
+            seed: random seed for hash permutations
+            capacity: optional maximum number of compacted texts, the oldest segments are dropped once exceeded. This bounds memory
+                      usage, duplicates are then only detected within the most recent texts. Should be a multiple of segment.
+            segment: number of texts indexed in memory before compacting
+        """
+
+        if permutations % bands:
+            raise ValueError("permutations must be a multiple of bands")
+
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = permutations // bands
+        self.ngrams = ngrams
+
+        # Universal hash parameters
+        generator = np.random.default_rng(seed)
+        self.a = generator.integers(1, 1 << 32, permutations, dtype=np.uint64)
+        self.b = generator.integers(0, 1 << 32, permutations, dtype=np.uint64)
+
+        # Band key hash parameters, each band has its own seed so band keys don't collide across bands
+        self.seeds = generator.integers(0, np.iinfo(np.uint64).max, bands, dtype=np.uint64, endpoint=True)
+        self.multiplier = np.uint64(0x100000001B3)
+
+        # Index size limits
+        self.capacity = capacity
+        self.segment = segment
+
+        # Compacted segments, each is (signatures, sorted band keys, signature positions)
+        self.segments = []
+
+        # Texts indexed since the last compaction, band key to positions in signatures
+        self.signatures, self.buckets = [], {}
+
+    def __call__(self, rows):
+        """
+        Filters near-duplicate rows. Unique rows are added to the index.
+
+        Args:
+            rows: list of {id, text}
+
+        Returns:
+            rows that aren't near-duplicates of a previously seen row
+        """
+
+        if not rows:
+            return rows
+
+        signatures = self.signature([row["text"] for row in rows])
+        keys = self.keys(signatures)
+
+        # Look up compacted segments for the whole batch, then check and index rows in order
+        duplicates = self.search(signatures, keys)
+        results = [row for x, row in enumerate(rows) if x not in duplicates and self.insert(signatures[x], keys[x])]
+
+        # Compact between batches, batch lookups above don't see segments compacted mid-batch
+        if len(self.signatures) >= self.segment:
+            self.compact()
+
+        return results
+
+    def statements(self, outputs):
+        """
+        Removes duplicate statements within each output row. Statements are compared after normalizing case and whitespace. The first
+        occurrence is kept, which drops unanswerable statements that repeat an answerable statement for the same context.
+
+        Args:
+            outputs: list of output rows
+
+        Returns:
+            outputs
+        """
+
+        for output in outputs:
+            seen, statements = set(), []
+            for statement in output["statements"]:
+                key = " ".join(statement["source"].lower().split())
+                if key not in seen:
+                    seen.add(key)
+                    statements.append(statement)
+
+            output["statements"] = statements
+
+        return outputs
+
+    def signature(self, texts):
+        """
+        Computes MinHash signatures for a batch of texts.
+
+        Args:
+            texts: list of texts
+
+        Returns:
+            signatures array with shape (len(texts), permutations)
+        """
+
+        # Hash shingles for all texts into a single array
+        hashes, offsets = [], []
+        for text in texts:
+            offsets.append(len(hashes))
+            hashes.extend(zlib.crc32(shingle.encode("utf-8")) for shingle in self.shingles(text))
+
+        # Apply all permutations at once and take the minimum per text
+        hashes = np.array(hashes, dtype=np.uint64)[:, None]
+        values = ((hashes * self.a + self.b) % np.uint64(Deduplicate.PRIME)) & np.uint64(0xFFFFFFFF)
+
+        return np.minimum.reduceat(values, offsets, axis=0).astype(np.uint32)
+
+    def shingles(self, text):
+        """
+        Splits text into word n-gram shingles.
+
+        Args:
+            text: input text
+
+        Returns:
+            set of shingles
+        """
+
+        tokens = re.findall(r"\w+", text.lower())
+        if len(tokens) <= self.ngrams:
+            return {" ".join(tokens)}
+
+        return {" ".join(tokens[x : x + self.ngrams]) for x in range(len(tokens) - self.ngrams + 1)}
+
+    def keys(self, signatures):
+        """
+        Computes 64-bit LSH band keys for a batch of signatures.
+
+        Args:
+            signatures: signatures array with shape (texts, permutations)
+
+        Returns:
+            band keys array with shape (texts, bands)
+        """
+
+        bands = signatures.reshape(len(signatures), self.bands, self.rows).astype(np.uint64)
+
+        # FNV style hash of band values, uint64 arithmetic wraps around
+        keys = np.broadcast_to(self.seeds, bands.shape[:2]).copy()
+        for x in range(self.rows):
+            keys = (keys ^ bands[:, :, x]) * self.multiplier
+
+        return keys
+
+    def search(self, signatures, keys):
+        """
+        Finds near-duplicates of indexed texts in compacted segments.
+
+        Args:
+            signatures: signatures array for a batch of texts
+            keys: band keys array for a batch of texts
+
+        Returns:
+            set of batch positions that are near-duplicates
+        """
+
+        duplicates = set()
+        for indexed, skeys, positions in self.segments:
+            # Binary search all band keys in the batch at once
+            flat = keys.ravel()
+            start, end = np.searchsorted(skeys, flat, side="left"), np.searchsorted(skeys, flat, side="right")
+
+            for match in np.flatnonzero(end > start):
+                x = int(match // self.bands)
+                if x not in duplicates:
+                    candidates = positions[start[match] : end[match]]
+                    if (np.mean(indexed[candidates] == signatures[x], axis=1) >= self.threshold).any():
+                        duplicates.add(x)
+
+        return duplicates
+
+    def insert(self, signature, keys):
+        """
+        Checks if a signature is a near-duplicate of a signature indexed since the last compaction and indexes it when it's not.
+
+        Args:
+            signature: MinHash signature
+            keys: band keys
+
+        Returns:
+            True if signature is unique and was inserted, False otherwise
+        """
+
+        keys = keys.tolist()
+
+        # Check candidates that share at least one band
+        candidates = set()
+        for key in keys:
+            candidates.update(self.buckets.get(key, ()))
+
+        for candidate in candidates:
+            if np.mean(self.signatures[candidate] == signature) >= self.threshold:
+                return False
+
+        # Index unique signature
+        uid = len(self.signatures)
+        self.signatures.append(signature)
+        for key in keys:
+            self.buckets.setdefault(key, []).append(uid)
+
+        return True
+
+    def compact(self):
+        """
+        Compacts texts indexed in memory into a new segment and merges segments. Segments are merged when the previous segment isn't
+        larger than the newest segment, so the number of segments grows logarithmically. When a capacity is set, merged segments are
+        limited to a quarter of the capacity and the oldest segments are dropped once the capacity is exceeded.
+        """
+
+        signatures = np.array(self.signatures, dtype=np.uint32)
+        keys, positions = self.sort(self.keys(signatures))
+        self.segments.append((signatures, keys, positions))
+        self.signatures, self.buckets = [], {}
+
+        while len(self.segments) > 1 and len(self.segments[-2][0]) <= len(self.segments[-1][0]):
+            first, second = self.segments[-2], self.segments[-1]
+            if self.capacity and len(first[0]) + len(second[0]) > self.capacity // 4:
+                break
+
+            self.segments[-2:] = [self.merge(first, second)]
+
+        # Drop oldest segments
+        while self.capacity and len(self.segments) > 1 and sum(len(segment[0]) for segment in self.segments) > self.capacity:
+            self.segments.pop(0)
+
+    def merge(self, first, second):
+        """
+        Merges two segments.
+
+        Args:
+            first: older segment
+            second: newer segment
+
+        Returns:
+            merged segment
+        """
+
+        keys = np.concatenate([first[1], second[1]])
+        positions = np.concatenate([first[2], second[2] + len(first[0])])
+
+        order = np.argsort(keys, kind="stable")
+        return np.concatenate([first[0], second[0]]), keys[order], positions[order]
+
+    def sort(self, keys):
+        """
+        Flattens band keys and sorts them along with signature positions.
+
+        Args:
+            keys: band keys array with shape (texts, bands)
+
+        Returns:
+            (sorted keys, positions)
+        """
+
+        positions = np.repeat(np.arange(len(keys), dtype=np.uint32), self.bands)
+        keys = keys.ravel()
+
+        order = np.argsort(keys, kind="stable")
+        return keys[order], positions[order]
@@ -0,0 +1,201 @@
+"""
+Filters module
+"""
+
+import re
+
+from ..prompt import Prompt
+
+
+class Filter:
+    """
+    Base class for quality filters. Filters score batches of generated (context, source, target) pairs and flag pairs to keep.
+    """
+
+    # Filter name used in rejection counts
+    name = "filter"
+
+    def __call__(self, pairs):
+        """
+        Checks a batch of generated pairs.
+
+        Args:
+            pairs: list of {context, source, target}
+
+        Returns:
+            list of booleans, True to keep a pair
+        """
+
+        raise NotImplementedError
+
+    def tokens(self, text):
+        """
+        Splits text into lower cased word tokens.
+
+        Args:
+            text: input text
+
+        Returns:
+            list of tokens
+        """
+
+        return re.findall(r"\w+", text.lower())
+
+
+class EmptyTarget(Filter):
+    """
+    Rejects pairs with empty or very short targets.
+    """
+
+    name = "empty"
+
+    def __init__(self, minlength=1):
+        """
+        Creates a new EmptyTarget filter.
+
+        Args:
+            minlength: minimum number of word tokens in a target
+        """
+
+        self.minlength = minlength
+
+    def __call__(self, pairs):
+        return [len(self.tokens(pair["target"])) >= self.minlength for pair in pairs]
+
+
+class EchoedQuestion(Filter):
+    """
+    Rejects pairs where the target repeats the source statement. Uses the Jaccard similarity of source and target word tokens.
+    """
+
+    name = "echo"
+
+    def __init__(self, threshold=0.9):
+        """
+        Creates a new EchoedQuestion filter.
+
+        Args:
+            threshold: minimum token similarity for a target to be considered an echo of the source
+        """
+
+        self.threshold = threshold
+
+    def __call__(self, pairs):
+        results = []
+        for pair in pairs:
+            source, target = set(self.tokens(pair["source"])), set(self.tokens(pair["target"]))
+            union = source | target
+            results.append(not union or len(source & target) / len(union) < self.threshold)
+
+        return results
+
+
+class CopiedStatement(Filter):
+    """
+    Rejects pairs where the source statement is a verbatim span of the context, which happens when the statement model copies
+    context text instead of generating a question.
+    """
+
+    name = "copy"
+
+    def __init__(self, minlength=6):
+        """
+        Creates a new CopiedStatement filter.
+
+        Args:
+            minlength: minimum number of word tokens in a copied span, shorter statements are kept
+        """
+
+        self.minlength = minlength
+
+    def __call__(self, pairs):
+        results, contexts = [], {}
+        for pair in pairs:
+            source = self.tokens(pair["source"])
+
+            # Contexts are shared by all pairs for a row, only normalize once
+            context = contexts.get(pair["context"])
+            if context is None:
+                context = contexts[pair["context"]] = f" {' '.join(self.tokens(pair['context']))} "
+
+            results.append(len(source) < self.minlength or f" {' '.join(source)} " not in context)
+
+        return results
+
+
+class ScoreFilter(Filter):
+    """
+    Rejects pairs scored below a threshold by a scoring model, for example a cross-encoder or a reward model. Pairs are formatted
+    with a template and scored in batches.
+    """
+
+    name = "score"
+
+    def __init__(self, model, threshold=0.5, template="Question: {source}\nAnswer: {target}", batchsize=64):
+        """
+        Creates a new ScoreFilter.
+
+        Args:
+            model: scoring model, callable that takes a list of texts and returns a score per text
+            threshold: minimum score to keep a pair
+            template: pair format template, supports context, source and target fields
+            batchsize: number of pairs scored per model call
+        """
+
+        self.model = model
+        self.threshold = threshold
+        self.template = Prompt(template, ["context", "source", "target"])
+        self.batchsize = batchsize
+
+    def __call__(self, pairs):
+        texts = [self.template.render(pair) for pair in pairs]
+
+        scores = []
+        for x in range(0, len(texts), self.batchsize):
+            scores.extend(self.model(texts[x : x + self.batchsize]))
+
+        return [score >= self.threshold for score in scores]
+
+
+class Filters:
+    """
+    Runs quality filters over generated outputs. Filters run in order and each filter only sees pairs kept by the previous filters,
+    so cheap heuristics should run before scoring models. Output rows left without statements are removed.
+    """
+
+    def __init__(self, filters=None):
+        """
+        Creates a new Filters instance.
+
+        Args:
+            filters: list of Filter instances, defaults to EmptyTarget, EchoedQuestion and CopiedStatement
+        """
+
+        self.filters = filters if filters else [EmptyTarget(), EchoedQuestion(), CopiedStatement()]
+
+    def __call__(self, outputs):
+        """
+        Filters a batch of outputs.
+
+        Args:
+            outputs: list of output rows
+
+        Returns:
+            (filtered outputs, dict of rejected pairs per filter)
+        """
+
+        # Flatten outputs into (row, statement) pairs
+        pairs = [(x, statement) for x, output in enumerate(outputs) for statement in output["statements"]]
+
+        rejected = {}
+        for instance in self.filters:
+            results = instance([{"context": outputs[x]["context"], **statement} for x, statement in pairs]) if pairs else []
+            rejected[instance.name] = rejected.get(instance.name, 0) + results.count(False)
+            pairs = [pair for x, pair in enumerate(pairs) if results[x]]
+
+        # Rebuild output rows from kept pairs
+        statements = {}
+        for x, statement in pairs:
+            statements.setdefault(x, []).append(statement)
+
+        return [{**output, "statements": statements[x]} for x, output in enumerate(outputs) if x in statements], rejected
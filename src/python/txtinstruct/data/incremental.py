@@ -0,0 +1,265 @@
+"""
+Incremental module
+"""
+
+import hashlib
+import json
+import os
+
+from ..prompt import Prompt
+from .writer import WriterFactory
+
+
+class IncrementalBuilder:
+    """
+    Builds a dataset incrementally for corpora that grow over time. Each run generates outputs only for new or changed rows and
+    writes them to a new segment file. A manifest tracks the content hash and segment lines for each row id along with a fingerprint
+    of the generation settings. When the fingerprint changes, all rows are marked stale and generated again the next time they are
+    read. Outputs of stale rows are kept until then, so a run with only new rows doesn't drop earlier outputs.
+
+    After each run, the live lines from all segments are written to a compacted output file. Rows replaced by a later segment are
+    skipped. Rows missing from the input are kept, input rows can be the full corpus or only the rows added since the last run.
+    """
+
+    def __init__(self, builder, path):
+        """
+        Creates a new IncrementalBuilder.
+
+        Args:
+            builder: DatasetBuilder instance, row ids are added to segment outputs
+            path: directory for the manifest and segment files
+        """
+
+        self.builder = builder
+        self.path = path
+
+        # Segment outputs link back to input rows
+        self.builder.ids = True
+
+    def __call__(self, rows, output, writer=None):
+        """
+        Generates outputs for new and changed rows and writes the compacted output.
+
+        Args:
+            rows: iterable of {id, text}
+            output: compacted output file path
+            writer: optional output format, inferred from output path when not provided
+
+        Returns:
+            number of input rows generated in this run
+        """
+
+        os.makedirs(self.path, exist_ok=True)
+
+        # Mark all rows stale when generation settings changed, stale rows keep their outputs until generated again
+        manifest, fingerprint, stale = self.load(), self.fingerprint(), []
+        if manifest["fingerprint"] != fingerprint:
+            manifest["fingerprint"] = fingerprint
+            for entry in manifest["rows"].values():
+                entry["stale"] = True
+
+        # Generate new and changed rows into a new segment
+        segment, delta = f"segment-{manifest['next']:05d}.jsonl", {}
+        self.builder(self.delta(rows, manifest["rows"], delta), None, os.path.join(self.path, segment))
+
+        if delta:
+            stale.extend(self.update(manifest, segment, delta))
+        else:
+            stale.append(segment)
+
+        # Delete segments after the saved manifest no longer references them
+        self.save(manifest)
+        self.remove(stale)
+
+        self.compact(manifest, output, writer)
+
+        return len(delta)
+
+    def delta(self, rows, current, delta):
+        """
+        Selects new, changed and stale rows.
+
+        Args:
+            rows: iterable of {id, text}
+            current: manifest rows
+            delta: dict of selected row id to content hash, updated as rows are selected
+
+        Returns:
+            new, changed and stale rows
+        """
+
+        for row in rows:
+            digest = hashlib.sha256(row["text"].encode("utf-8")).hexdigest()
+
+            entry = current.get(str(row["id"]))
+            if (not entry or entry["hash"] != digest or entry.get("stale")) and str(row["id"]) not in delta:
+                delta[str(row["id"])] = digest
+                yield row
+
+    def update(self, manifest, segment, delta):
+        """
+        Points manifest rows to the new segment. Rows without outputs, for example rows removed as duplicates, are still recorded
+        so they aren't generated again.
+
+        Args:
+            manifest: manifest
+            segment: segment file name
+            delta: dict of generated row id to content hash
+
+        Returns:
+            list of segments fully replaced by later segments
+        """
+
+        rows = manifest["rows"]
+        for uid, digest in delta.items():
+            rows[uid] = {"hash": digest, "segment": segment, "lines": []}
+
+        with open(os.path.join(self.path, segment), "r", encoding="utf-8") as f:
+            for line, data in enumerate(f):
+                rows[str(json.loads(data)["id"])]["lines"].append(line)
+
+        # Checkpoint isn't needed once the segment is recorded
+        os.remove(os.path.join(self.path, f"{segment}.checkpoint"))
+
+        manifest["segments"].append(segment)
+        manifest["next"] += 1
+
+        # Drop segments replaced by later segments
+        live = {entry["segment"] for entry in rows.values() if entry["lines"]} | {segment}
+        stale = [x for x in manifest["segments"] if x not in live]
+        manifest["segments"] = [x for x in manifest["segments"] if x in live]
+
+        return stale
+
+    def compact(self, manifest, output, writer):
+        """
+        Writes the live lines from all segments to a single output file.
+
+        Args:
+            manifest: manifest
+            output: output file path
+            writer: optional output format
+        """
+
+        # Live lines per segment
+        live = {segment: set() for segment in manifest["segments"]}
+        for entry in manifest["rows"].values():
+            if entry["lines"]:
+                live[entry["segment"]].update(entry["lines"])
+
+        with WriterFactory.create(output, writer) as outputs:
+            for segment in manifest["segments"]:
+                with open(os.path.join(self.path, segment), "r", encoding="utf-8") as f:
+                    batch = []
+                    for line, data in enumerate(f):
+                        if line in live[segment]:
+                            data = json.loads(data)
+                            data.pop("id")
+                            batch.append(data)
+
+                    outputs.write(batch)
+
+    def fingerprint(self):
+        """
+        Calculates a fingerprint of the settings that change generated outputs: prompts, statement templates, model identities,
+        generation budgets along with chunker, quality filter, near-duplicate detection and negative sampling settings. Filters
+        are described by their class and simple settings, filter models and negative sampling indexes aren't included.
+
+        Returns:
+            fingerprint
+        """
+
+        builder = self.builder
+        data = [
+            builder.prompt.template,
+            builder.sprompt.template,
+            [template.template for template in builder.templates] if builder.templates else None,
+            builder.identity(builder.model),
+            builder.identity(builder.statement),
+        ]
+
+        # Generation budgets only change the fingerprint when set
+        budgets = [builder.maxtokens, builder.smaxtokens, builder.stop, builder.sstop]
+        if any(budgets):
+            data.append(budgets)
+
+        # Row and statement processing settings only change the fingerprint when set
+        chunker, dedup, negatives = builder.chunker, builder.dedup, builder.negatives
+        processing = [
+            [getattr(chunker.tokenizer, "name_or_path", None), chunker.size, chunker.overlap] if chunker else None,
+            [self.settings(x) for x in builder.filters.filters] if builder.filters else None,
+            [dedup.threshold, dedup.bands, dedup.rows, dedup.ngrams, dedup.capacity] if dedup else None,
+            [negatives.mode, negatives.size, negatives.limit, negatives.maxscore] if negatives.mode != "batch" else None,
+        ]
+        if any(processing):
+            data.append(processing)
+
+        return hashlib.sha256(json.dumps(data).encode("utf-8")).hexdigest()
+
+    def settings(self, component):
+        """
+        Describes a component with its class name and settings. Settings are attributes with string, number or boolean values
+        along with prompt templates.
+
+        Args:
+            component: component instance
+
+        Returns:
+            [class name, settings]
+        """
+
+        settings = {}
+        for name, value in sorted(vars(component).items()):
+            if isinstance(value, (str, int, float, bool)):
+                settings[name] = value
+            elif isinstance(value, Prompt):
+                settings[name] = value.template
+
+        return [type(component).__name__, settings]
+
+    def load(self):
+        """
+        Loads the manifest.
+
+        Returns:
+            manifest
+        """
+
+        path = os.path.join(self.path, "manifest.json")
+        if not os.path.exists(path):
+            return {"fingerprint": None, "next": 0, "segments": [], "rows": {}}
+
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def remove(self, segments):
+        """
+        Deletes segment files and their checkpoints.
+
+        Args:
+            segments: list of segment file names
+        """
+
+        for segment in segments:
+            for path in [segment, f"{segment}.checkpoint"]:
+                path = os.path.join(self.path, path)
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def save(self, manifest):
+        """
+        Saves the manifest. The manifest is written to a temporary file and then moved into place.
+
+        Args:
+            manifest: manifest
+        """
+
+        path = os.path.join(self.path, "manifest.json")
+
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(tmp, path)
@@ -0,0 +1,172 @@
+"""
+Metrics module
+"""
+
+import json
+import sys
+import time
+
+from contextlib import contextmanager
+from threading import Lock
+
+try:
+    import resource
+
+    RESOURCE = True
+except ImportError:
+    RESOURCE = False
+
+
+class Metrics:
+    """
+    Collects per-stage throughput and latency metrics for DatasetBuilder runs. Each measured batch is passed to callbacks as it
+    completes and aggregated into run statistics: rows/sec, tokens/sec, batch latency percentiles, peak memory and quality filter
+    rejection counts.
+    """
+
+    def __init__(self, callbacks=None, path=None, tokenizer=None):
+        """
+        Creates a new Metrics instance.
+
+        Args:
+            callbacks: optional list of functions called with (stage, {rows, tokens, latency}) after each measured batch
+            path: optional path to save run statistics as JSON when a run completes
+            tokenizer: optional tokenizer used to count tokens, defaults to counting whitespace separated words
+        """
+
+        self.callbacks = callbacks if callbacks else []
+        self.path = path
+        self.tokenizer = tokenizer
+
+        # Stages are measured from multiple threads when pipelining is enabled
+        self.lock = Lock()
+        self.stages = {}
+        self.rejected = {}
+        self.start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name, rows):
+        """
+        Measures a batch for a stage. The measured block can set the number of tokens processed on the yielded dict.
+
+        Args:
+            name: stage name
+            rows: number of rows in batch
+
+        Returns:
+            dict with rows and tokens for this batch
+        """
+
+        batch = {"rows": rows, "tokens": 0}
+
+        start = time.perf_counter()
+        yield batch
+        batch["latency"] = time.perf_counter() - start
+
+        with self.lock:
+            stage = self.stages.setdefault(name, {"batches": 0, "rows": 0, "tokens": 0, "latencies": []})
+            stage["batches"] += 1
+            stage["rows"] += batch["rows"]
+            stage["tokens"] += batch["tokens"]
+            stage["latencies"].append(batch["latency"])
+
+        for callback in self.callbacks:
+            callback(name, batch)
+
+    def reject(self, counts):
+        """
+        Adds rejected rows to the rejection counts.
+
+        Args:
+            counts: dict of rejected rows per filter
+        """
+
+        with self.lock:
+            for name, count in counts.items():
+                self.rejected[name] = self.rejected.get(name, 0) + count
+
+    def count(self, *texts):
+        """
+        Counts tokens in lists of texts.
+
+        Args:
+            texts: lists of texts
+
+        Returns:
+            number of tokens
+        """
+
+        texts = [text for values in texts for text in values]
+        if self.tokenizer:
+            return sum(len(ids) for ids in self.tokenizer(texts)["input_ids"])
+
+        return sum(len(text.split()) for text in texts)
+
+    def stats(self):
+        """
+        Gets run statistics.
+
+        Returns:
+            dict of run statistics
+        """
+
+        with self.lock:
+            stages = {}
+            for name, stage in self.stages.items():
+                seconds = sum(stage["latencies"])
+                latencies = sorted(stage["latencies"])
+
+                stages[name] = {
+                    "batches": stage["batches"],
+                    "rows": stage["rows"],
+                    "tokens": stage["tokens"],
+                    "seconds": seconds,
+                    "rowspersec": stage["rows"] / seconds if seconds else 0,
+                    "tokenspersec": stage["tokens"] / seconds if seconds else 0,
+                    "latency": {f"p{p}": self.percentile(latencies, p) for p in (50, 90, 99)},
+                }
+
+            rejected = dict(self.rejected)
+
+        return {"elapsed": time.perf_counter() - self.start, "memory": self.memory(), "stages": stages, "rejected": rejected}
+
+    def save(self):
+        """
+        Saves run statistics as JSON, if an output path is set.
+        """
+
+        if self.path:
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(self.stats(), f, indent=4)
+
+    def percentile(self, values, p):
+        """
+        Calculates a percentile using the nearest-rank method.
+
+        Args:
+            values: sorted list of values
+            p: percentile
+
+        Returns:
+            percentile value
+        """
+
+        if not values:
+            return 0
+
+        return values[max(0, -(-len(values) * p // 100) - 1)]
+
+    def memory(self):
+        """
+        Gets the peak resident memory of the current process in bytes.
+
+        Returns:
+            peak memory in bytes, None when not available on this platform
+        """
+
+        if not RESOURCE:
+            return None
+
+        # ru_maxrss is reported in bytes on macOS and kilobytes on Linux
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
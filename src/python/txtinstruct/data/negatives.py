@@ -0,0 +1,216 @@
+"""
+Negatives module
+"""
+
+import random
+
+from collections import Counter, OrderedDict
+
+
+class Negatives:
+    """
+    Samples unanswerable statements. Each row is paired with a statement generated for a different row. The following sampling
+    modes are supported.
+
+      - batch: samples from other rows in the current batch (default)
+      - reservoir: samples from a fixed size uniform reservoir of rows seen across the whole dataset
+      - index: samples hard negatives, statements from the most similar contexts in a precomputed index such as txtai Embeddings.
+               Falls back to reservoir sampling when no similar context with known statements is found.
+
+    All sampling uses the random module, which keeps output deterministic. Reservoir and index modes keep state across batches, this
+    state is saved with checkpoints so resumed builds match uninterrupted builds.
+    """
+
+    def __init__(self, mode="batch", size=10000, index=None, limit=10, maxscore=0.95):
+        """
+        Creates a new Negatives instance.
+
+        Args:
+            mode: sampling mode (batch, reservoir or index)
+            size: reservoir size and maximum number of rows with known statements kept for index lookups
+            index: index with a batchsearch(queries, limit) method, required for index mode, index ids must match row ids
+            limit: number of index search results per row
+            maxscore: index results with a score above this value are considered duplicates and skipped
+        """
+
+        if mode not in ("batch", "reservoir", "index"):
+            raise ValueError(f"Unsupported negative sampling mode: {mode}")
+
+        if mode == "index" and not index:
+            raise ValueError("index mode requires an index")
+
+        self.mode = mode
+        self.size = size
+        self.index = index
+        self.limit = limit
+        self.maxscore = maxscore
+
+        # Uniform reservoir sample of (id, candidates) and the number of rows seen
+        self.reservoir, self.count = [], 0
+
+        # Most recent rows with known statements, used for index lookups
+        self.seen = OrderedDict()
+
+    def __call__(self, ids, texts, candidates):
+        """
+        Samples an unanswerable statement for each row.
+
+        Args:
+            ids: list of row ids
+            texts: list of row texts
+            candidates: list of statements per row, the first statement is the generated statement
+
+        Returns:
+            list with an unanswerable statement per row, None when a row has no negative available
+        """
+
+        if self.mode == "batch":
+            return self.batch(ids, candidates)
+
+        # Add current batch to the reservoir
+        self.add(ids, candidates)
+
+        if self.mode == "index":
+            return self.search(ids, texts, candidates)
+
+        return [self.sample(uid, candidates[x]) for x, uid in enumerate(ids)]
+
+    def batch(self, ids, candidates):
+        """
+        Samples negatives from other rows in the batch. Rows with the same id, such as chunks of the same input row, are skipped.
+
+        Args:
+            ids: list of row ids
+            candidates: list of statements per row
+
+        Returns:
+            list of negatives
+        """
+
+        negatives, size, counts = [], len(candidates), Counter(ids)
+        for x, uid in enumerate(ids):
+            if counts[uid] == 1:
+                # Pick any other row in constant time
+                y = random.randrange(size - 1) if size > 1 else None
+                y = y + 1 if y is not None and y >= x else y
+            else:
+                # Pick a row with a different id
+                others = [y for y, other in enumerate(ids) if other != uid]
+                y = others[random.randrange(len(others))] if others else None
+
+            negatives.append(self.select(candidates[y], candidates[x]) if y is not None else None)
+
+        return negatives
+
+    def search(self, ids, texts, candidates):
+        """
+        Samples hard negatives using index search results.
+
+        Args:
+            ids: list of row ids
+            texts: list of row texts
+            candidates: list of statements per row
+
+        Returns:
+            list of negatives
+        """
+
+        negatives = []
+        for x, results in enumerate(self.index.batchsearch(texts, self.limit)):
+            negative = None
+            for result in results:
+                uid, score = (result["id"], result["score"]) if isinstance(result, dict) else result
+
+                # Pick the most similar context with known statements that isn't a duplicate
+                if uid != ids[x] and score <= self.maxscore and uid in self.seen:
+                    negative = self.select(self.seen[uid], candidates[x])
+                    break
+
+            negatives.append(negative if negative else self.sample(ids[x], candidates[x]))
+
+        return negatives
+
+    def sample(self, uid, candidates):
+        """
+        Samples a negative from the reservoir.
+
+        Args:
+            uid: row id
+            candidates: statements for row
+
+        Returns:
+            negative or None if the reservoir has no other rows
+        """
+
+        for _ in range(10):
+            other, statements = random.choice(self.reservoir)
+            if other != uid:
+                return self.select(statements, candidates)
+
+        return None
+
+    def select(self, statements, candidates):
+        """
+        Selects a negative statement from another row's statements. Statements also generated for the current row are skipped.
+
+        Args:
+            statements: statements for the other row
+            candidates: statements for the current row
+
+        Returns:
+            negative statement
+        """
+
+        return random.choice(statements) if len(statements) > 1 and statements[1] not in candidates else statements[0]
+
+    def add(self, ids, candidates):
+        """
+        Adds rows to the reservoir and the recently seen rows.
+
+        Args:
+            ids: list of row ids
+            candidates: list of statements per row
+        """
+
+        for x, uid in enumerate(ids):
+            self.count += 1
+
+            # Reservoir sampling, each row seen so far has an equal chance of being in the reservoir
+            if len(self.reservoir) < self.size:
+                self.reservoir.append((uid, candidates[x]))
+            else:
+                y = random.randrange(self.count)
+                if y < self.size:
+                    self.reservoir[y] = (uid, candidates[x])
+
+            if self.mode == "index":
+                self.seen[uid] = candidates[x]
+                self.seen.move_to_end(uid)
+                if len(self.seen) > self.size:
+                    self.seen.popitem(last=False)
+
+    def state(self):
+        """
+        Gets sampling state for checkpoints. Batch mode doesn't keep state across batches.
+
+        Returns:
+            JSON serializable sampling state or None in batch mode
+        """
+
+        if self.mode == "batch":
+            return None
+
+        # Copy the reservoir, it's updated in place by later batches
+        return {"reservoir": list(self.reservoir), "count": self.count, "seen": list(self.seen.items())}
+
+    def restore(self, state):
+        """
+        Restores sampling state from a checkpoint.
+
+        Args:
+            state: sampling state
+        """
+
+        self.reservoir = [tuple(row) for row in state["reservoir"]]
+        self.count = state["count"]
+        self.seen = OrderedDict((uid, candidates) for uid, candidates in state["seen"])
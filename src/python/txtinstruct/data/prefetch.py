@@ -0,0 +1,95 @@
+"""
+Prefetch module
+"""
+
+from queue import Empty, Full, Queue
+from threading import Event, Thread
+
+
+class Prefetch:
+    """
+    Runs a function over an iterable of batches in a background thread. Results are computed ahead of the consumer, up to a
+    bounded number of batches, and yielded as (batch, result) pairs in input order.
+    """
+
+    def __init__(self, batches, function, size=1):
+        """
+        Creates a new Prefetch instance.
+
+        Args:
+            batches: iterable of batches
+            function: function to run for each batch
+            size: maximum number of results computed ahead of the consumer
+        """
+
+        self.batches = batches
+        self.function = function
+        self.size = size
+
+    def __iter__(self):
+        queue, stop = Queue(self.size), Event()
+
+        # Start producer thread
+        thread = Thread(target=self.produce, args=(queue, stop), daemon=True)
+        thread.start()
+
+        try:
+            while True:
+                batch, result, error = queue.get()
+
+                # Raise producer errors in the consumer thread
+                if error is not None:
+                    raise error
+
+                # End of input
+                if batch is None:
+                    break
+
+                yield batch, result
+        finally:
+            # Signal the producer to stop and wait for it to exit
+            stop.set()
+            while thread.is_alive():
+                try:
+                    queue.get_nowait()
+                except Empty:
+                    thread.join(0.1)
+
+    def produce(self, queue, stop):
+        """
+        Producer thread that runs the function for each batch and adds results to queue.
+
+        Args:
+            queue: output queue
+            stop: stop event set when the consumer exits
+        """
+
+        try:
+            for batch in self.batches:
+                if stop.is_set():
+                    return
+
+                self.put(queue, stop, (batch, self.function(batch), None))
+
+            self.put(queue, stop, (None, None, None))
+
+        # pylint: disable=W0718
+        except BaseException as error:
+            self.put(queue, stop, (None, None, error))
+
+    def put(self, queue, stop, item):
+        """
+        Adds an item to queue, blocking until space is available or the consumer exits.
+
+        Args:
+            queue: output queue
+            stop: stop event
+            item: item to add
+        """
+
+        while not stop.is_set():
+            try:
+                queue.put(item, timeout=0.1)
+                return
+            except Full:
+                pass
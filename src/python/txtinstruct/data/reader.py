@@ -0,0 +1,174 @@
+"""
+Reader module
+"""
+
+import gzip
+import json
+import os
+
+
+class Reader:
+    """
+    Streams rows from JSONL, gzip compressed JSONL, Parquet and JSON files along with Arrow datasets written by ArrowWriter. All
+    formats except JSON are read incrementally, so memory usage stays constant as input files grow. A Reader can be iterated multiple
+    times and is picklable, which allows passing it to ShardedBuilder processes and training dataset generators.
+    """
+
+    def __init__(self, path, columns=None, batchsize=1024):
+        """
+        Creates a new Reader.
+
+        Args:
+            path: input file path
+            columns: optional dict of output field to input column, for example {"id": "title"}, other columns are kept
+            batchsize: number of Parquet rows read at a time
+        """
+
+        self.path = path
+        self.columns = columns
+        self.batchsize = batchsize
+
+    def __iter__(self):
+        for row in self.rows():
+            yield {**row, **{field: row[column] for field, column in self.columns.items()}} if self.columns else row
+
+    def __getstate__(self):
+        # Pickled state includes file metadata. Hugging Face datasets caches generators by hashing the pickled arguments, this
+        # keeps a changed input file from being served a stale cached dataset.
+        return {**self.__dict__, "signature": self.signature()}
+
+    def __setstate__(self, state):
+        state = dict(state)
+        state.pop("signature", None)
+        self.__dict__.update(state)
+
+    def signature(self):
+        """
+        Gets the size and modification time of the input file. Arrow datasets are directories, each file in the directory is included.
+
+        Returns:
+            list of (file name, size, modification time in nanoseconds)
+        """
+
+        paths = [os.path.join(self.path, name) for name in sorted(os.listdir(self.path))] if os.path.isdir(self.path) else [self.path]
+        stats = [(path, os.stat(path)) for path in paths if os.path.exists(path)]
+        return [(os.path.basename(path), stat.st_size, stat.st_mtime_ns) for path, stat in stats]
+
+    def count(self):
+        """
+        Gets the number of rows when it's available without reading the file. Only supported for Parquet files.
+
+        Returns:
+            number of rows or None
+        """
+
+        if self.path.lower().endswith(".parquet"):
+            # pylint: disable=C0415
+            import pyarrow.parquet as pq
+
+            return pq.ParquetFile(self.path).metadata.num_rows
+
+        return None
+
+    def rows(self):
+        """
+        Reads rows from the input file. The file format is inferred from the file extension.
+
+        Returns:
+            rows
+        """
+
+        path = self.path.lower().rstrip("/")
+
+        if path.endswith(".arrow"):
+            yield from ArrowReader(self.path)
+
+        elif path.endswith(".parquet"):
+            # pylint: disable=C0415
+            import pyarrow.parquet as pq
+
+            for batch in pq.ParquetFile(self.path).iter_batches(batch_size=self.batchsize):
+                yield from batch.to_pylist()
+
+        elif path.endswith((".jsonl", ".jsonl.gz")):
+            with gzip.open(self.path, "rt", encoding="utf-8") if path.endswith(".gz") else open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+        else:
+            with open(self.path, "r", encoding="utf-8") as f:
+                yield from json.load(f)
+
+
+class ArrowReader:
+    """
+    Reads datasets written by ArrowWriter. Arrow files are memory-mapped and read one record batch at a time without copying or
+    parsing, only the current batch is converted to Python objects. Rows are rebuilt as {context, statements}, the same format as
+    the other DatasetBuilder outputs.
+    """
+
+    def __init__(self, path):
+        """
+        Creates a new ArrowReader.
+
+        Args:
+            path: dataset directory
+        """
+
+        self.path = path
+
+    def __getstate__(self):
+        # Same file metadata as Reader, a rebuilt dataset changes the datasets generator cache key
+        return {**self.__dict__, "signature": Reader(self.path).signature()}
+
+    def __setstate__(self, state):
+        state = dict(state)
+        state.pop("signature", None)
+        self.__dict__.update(state)
+
+    def __iter__(self):
+        contexts = self.values("contexts", ["context"])
+
+        # Statements are stored in context order
+        index, context, statements = -1, None, []
+        for offset, source, target in self.values("statements", ["context", "source", "target"]):
+            if offset != index:
+                if statements:
+                    yield {"context": context, "statements": statements}
+
+                # Advance to the referenced context
+                while index < offset:
+                    context = next(contexts, None)
+                    if context is None:
+                        raise IOError(f"Statement references missing context {offset} in {self.path}, contexts.arrow is truncated")
+
+                    context = context[0]
+                    index += 1
+
+                statements = []
+
+            statements.append({"source": source, "target": target})
+
+        # Last row
+        if statements:
+            yield {"context": context, "statements": statements}
+
+    def values(self, name, columns):
+        """
+        Reads column values from an Arrow file.
+
+        Args:
+            name: file name without extension
+            columns: list of columns to read
+
+        Returns:
+            tuples of column values
+        """
+
+        # pylint: disable=C0415
+        import pyarrow as pa
+
+        with pa.memory_map(os.path.join(self.path, f"{name}.arrow")) as source:
+            for batch in pa.ipc.open_stream(source):
+                yield from zip(*(batch.column(column).to_pylist() for column in columns))
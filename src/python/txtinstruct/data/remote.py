@@ -0,0 +1,195 @@
+"""
+Remote module
+"""
+
+import asyncio
+import json
+import random
+
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+
+class RemoteModel:
+    """
+    Text generation model served by a remote inference server with an OpenAI-compatible completions API. Requests run concurrently up
+    to a concurrency limit, failed requests are retried with exponential backoff and results are returned in input order.
+    """
+
+    def __init__(
+        self, url, model, task="language-generation", concurrency=16, retries=5, backoff=0.5, timeout=60, apikey=None, headers=None, **kwargs
+    ):
+        """
+        Creates a new RemoteModel.
+
+        Args:
+            url: server base url, for example http://localhost:8000/v1
+            model: model name sent with each request
+            task: model task (language-generation or sequence-sequence), used to select default prompts
+            concurrency: maximum number of requests in flight
+            retries: number of times a failed request is retried
+            backoff: initial retry delay in seconds, doubled after each attempt
+            timeout: request timeout in seconds
+            apikey: optional API key sent as a bearer token
+            headers: optional additional request headers
+            kwargs: additional generation parameters sent with each request, for example max_tokens or temperature
+        """
+
+        self.url = f"{url.rstrip('/')}/completions"
+        self.model = model
+        self.task = task
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.kwargs = kwargs
+
+        self.headers = {"Content-Type": "application/json", **(headers if headers else {})}
+        if apikey:
+            self.headers["Authorization"] = f"Bearer {apikey}"
+
+        # Requests block in worker threads, one thread per request in flight
+        self.executor = ThreadPoolExecutor(max_workers=concurrency)
+
+        # Concurrency limit, created for each event loop
+        self.loop, self.semaphore = None, None
+
+        # Separate generator for retry jitter, the global random state is reserved for data generation
+        self.random = random.Random()
+
+    def __call__(self, texts, **kwargs):
+        """
+        Runs text generation for a list of texts. Blocks until all results are available. This method starts an event loop, use
+        agenerate when an event loop is already running, for example in a Jupyter notebook.
+
+        Args:
+            texts: list of input texts
+            kwargs: generation arguments, see agenerate
+
+        Returns:
+            list of generated texts
+        """
+
+        # asyncio.run can't be called from a running event loop, for example in a Jupyter notebook
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.agenerate(texts, **kwargs))
+
+        raise RuntimeError("An event loop is already running, use await model.agenerate(texts) instead")
+
+    async def agenerate(self, texts, **kwargs):
+        """
+        Runs text generation for a list of texts concurrently.
+
+        Args:
+            texts: list of input texts
+            kwargs: generation arguments, max_new_tokens is sent as max_tokens and stop as stop, local pipeline arguments such as
+                    batch_size and truncation are ignored
+
+        Returns:
+            list of generated texts in input order
+        """
+
+        # Share the concurrency limit across all calls running on the same event loop
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            self.loop, self.semaphore = loop, asyncio.Semaphore(self.concurrency)
+
+        # Request arguments for this call
+        arguments = {"max_tokens": kwargs["max_new_tokens"]} if kwargs.get("max_new_tokens") else {}
+        if kwargs.get("stop"):
+            arguments["stop"] = kwargs["stop"]
+
+        return await asyncio.gather(*[self.generate(text, arguments) for text in texts])
+
+    async def generate(self, text, arguments):
+        """
+        Runs text generation for a single text, retrying failed requests.
+
+        Args:
+            text: input text
+            arguments: additional request arguments
+
+        Returns:
+            generated text
+        """
+
+        loop = asyncio.get_running_loop()
+
+        attempt = 0
+        while True:
+            try:
+                async with self.semaphore:
+                    return await loop.run_in_executor(self.executor, self.request, text, arguments)
+            except OSError as error:
+                if attempt >= self.retries or not self.retryable(error):
+                    raise
+
+                # Wait before the next attempt without holding a request slot
+                await asyncio.sleep(self.delay(error, attempt))
+                attempt += 1
+
+    def request(self, text, arguments):
+        """
+        Sends a completion request.
+
+        Args:
+            text: input text
+            arguments: additional request arguments
+
+        Returns:
+            generated text
+        """
+
+        data = json.dumps({"model": self.model, "prompt": text, **self.kwargs, **arguments}).encode("utf-8")
+        request = Request(self.url, data=data, headers=self.headers, method="POST")
+
+        with urlopen(request, timeout=self.timeout) as response:
+            choice = json.loads(response.read())["choices"][0]
+
+        # Servers drop the matched stop string from the output. Add it back when the server reports it (stop_reason, for example
+        # vLLM), which keeps refusals that end with a stop string intact.
+        stop = choice.get("stop_reason")
+        stop = stop if isinstance(stop, str) and stop in arguments.get("stop", []) else ""
+
+        return (choice["text"] + stop).strip()
+
+    def retryable(self, error):
+        """
+        Checks if a failed request should be retried. Connection errors, timeouts, rate limits and server errors are retried. Other
+        HTTP errors, such as invalid requests, are raised immediately.
+
+        Args:
+            error: request error
+
+        Returns:
+            True if request should be retried
+        """
+
+        if isinstance(error, HTTPError):
+            return error.code in (408, 429) or error.code >= 500
+
+        return True
+
+    def delay(self, error, attempt):
+        """
+        Calculates the delay before retrying a request. Uses exponential backoff with jitter, unless the server sent a Retry-After
+        header.
+
+        Args:
+            error: request error
+            attempt: number of failed attempts, starting at 0
+
+        Returns:
+            delay in seconds
+        """
+
+        delay = self.backoff * (2**attempt) * (0.5 + self.random.random())
+
+        # Honor server requested delay
+        if isinstance(error, HTTPError) and error.headers and error.headers.get("Retry-After", "").isdigit():
+            delay = max(delay, float(error.headers["Retry-After"]))
+
+        return delay
@@ -0,0 +1,275 @@
+"""
+Scheduler module
+"""
+
+from collections import deque
+
+
+class Scheduler:
+    """
+    Runs language generation with continuous batching. A fixed number of slots decode in lock step for a few tokens at a time.
+    Between steps, sequences that finished (end of sequence token, token budget or stop string) leave their slot and the slot is
+    refilled from the queue. With static batching, a batch runs until its longest output finishes, short outputs such as refusals
+    leave most of the batch idle.
+
+    Prompts are encoded once when a sequence enters a slot. The key-value cache of each slot is kept across steps and only the new
+    token is run through the model for each decoded token. Finished slots are dropped from the cache and new prompts are appended.
+    Only decoder-only (language-generation) models with a dynamic key-value cache are supported.
+    """
+
+    def __init__(self, model, tokenizer=None, slots=8, step=32, maxtokens=256, stop=None):
+        """
+        Creates a new Scheduler.
+
+        Args:
+            model: model path or Hugging Face causal language model
+            tokenizer: tokenizer or tokenizer path, loaded from model path when not provided
+            slots: number of sequences decoded concurrently
+            step: number of tokens decoded between slot refills
+            maxtokens: default maximum number of new tokens per sequence
+            stop: optional list of stop strings, sequences finish once a stop string is generated
+        """
+
+        if isinstance(model, str):
+            # pylint: disable=C0415
+            from transformers import AutoModelForCausalLM, AutoTokenizer
+
+            tokenizer = (
+                tokenizer if tokenizer and not isinstance(tokenizer, str) else AutoTokenizer.from_pretrained(tokenizer if tokenizer else model)
+            )
+            model = AutoModelForCausalLM.from_pretrained(model)
+
+        self.model = model.eval()
+        self.tokenizer = tokenizer
+
+        self.slots = slots
+        self.step = step
+        self.maxtokens = maxtokens
+        self.stop = stop
+
+        # Left padding keeps the last token of each sequence aligned for generation
+        self.pad = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id
+
+    def __call__(self, texts, max_new_tokens=None, stop=None, truncation=False, **kwargs):
+        """
+        Runs text generation for a list of texts.
+
+        Args:
+            texts: list of input texts
+            max_new_tokens: maximum number of new tokens per sequence, defaults to maxtokens
+            stop: optional list of stop strings, defaults to the stop strings set when created
+            truncation: truncates inputs to the maximum tokenizer length if True
+            kwargs: local pipeline arguments such as batch_size, these are ignored
+
+        Returns:
+            list of generated texts in input order
+        """
+
+        maxtokens = max_new_tokens if max_new_tokens else self.maxtokens
+        stop = stop if stop else self.stop
+        prompts = self.tokenizer(texts, truncation=truncation)["input_ids"]
+
+        queue, active, state = deque(range(len(texts))), [], None
+        outputs = [None] * len(texts)
+
+        while queue or active:
+            # Refill open slots, prompts of new sequences are encoded and added to the cache
+            refill = [queue.popleft() for _ in range(min(len(queue), self.slots - len(active)))]
+            if refill:
+                state = self.prefill([prompts[x] for x in refill], state)
+                active.extend((x, []) for x in refill)
+
+            # Decode the next step for all active sequences
+            tokens = min(self.step, max(maxtokens - len(generated) for _, generated in active))
+            for (_, generated), ids in zip(active, self.decode(state, tokens)):
+                generated.extend(ids)
+
+            # Release finished slots
+            running, rows = [], []
+            for row, (x, generated) in enumerate(active):
+                done, generated = self.finished(generated, maxtokens, stop)
+                if done:
+                    outputs[x] = self.text(generated)
+                else:
+                    running.append((x, generated))
+                    rows.append(row)
+
+            active, state = running, self.select(state, rows) if running else None
+
+        return outputs
+
+    def prefill(self, sequences, state):
+        """
+        Encodes prompts for new sequences and appends them to the cache state.
+
+        Args:
+            sequences: list of prompt token id lists
+            state: current cache state or None
+
+        Returns:
+            cache state
+        """
+
+        # pylint: disable=C0415
+        import torch
+
+        length = max(len(ids) for ids in sequences)
+        inputs = torch.tensor([[self.pad] * (length - len(ids)) + ids for ids in sequences], device=self.model.device)
+        mask = torch.tensor([[0] * (length - len(ids)) + [1] * len(ids) for ids in sequences], device=self.model.device)
+
+        # Positions start at the first prompt token
+        positions = (mask.cumsum(-1) - 1).clamp(min=0)
+
+        with torch.no_grad():
+            outputs = self.model(input_ids=inputs, attention_mask=mask, position_ids=positions, use_cache=True)
+
+        prefill = {"layers": self.layers(outputs.past_key_values), "mask": mask, "tokens": outputs.logits[:, -1].argmax(-1)}
+        return self.merge(state, prefill) if state else prefill
+
+    def decode(self, state, tokens):
+        """
+        Runs greedy decoding for all sequences in the cache state. The cache state is updated in place.
+
+        Args:
+            state: cache state
+            tokens: number of tokens to generate
+
+        Returns:
+            list of new token ids per sequence
+        """
+
+        # pylint: disable=C0415
+        import torch
+        from transformers import DynamicCache
+
+        generated, cache = [], DynamicCache(state["layers"])
+        with torch.no_grad():
+            for _ in range(tokens):
+                generated.append(state["tokens"])
+
+                # Only the last token is run through the model, prior tokens are read from the cache
+                positions = state["mask"].sum(-1, keepdim=True)
+                state["mask"] = torch.nn.functional.pad(state["mask"], (0, 1), value=1)
+
+                outputs = self.model(
+                    input_ids=state["tokens"].unsqueeze(-1),
+                    attention_mask=state["mask"],
+                    position_ids=positions,
+                    past_key_values=cache,
+                    use_cache=True,
+                )
+
+                state["tokens"] = outputs.logits[:, -1].argmax(-1)
+
+        state["layers"] = self.layers(cache)
+        return torch.stack(generated, dim=1).tolist()
+
+    def select(self, state, rows):
+        """
+        Selects rows from a cache state. Leading positions that are padding for all selected rows are removed.
+
+        Args:
+            state: cache state
+            rows: list of row indices to keep
+
+        Returns:
+            cache state
+        """
+
+        # pylint: disable=C0415
+        import torch
+
+        rows = torch.tensor(rows, device=self.model.device)
+        mask = state["mask"][rows]
+
+        # First position used by any row
+        start = int(mask.any(0).int().argmax())
+
+        return {
+            "layers": [(keys[rows, :, start:], values[rows, :, start:]) for keys, values in state["layers"]],
+            "mask": mask[:, start:],
+            "tokens": state["tokens"][rows],
+        }
+
+    def merge(self, first, second):
+        """
+        Merges two cache states. The shorter state is left padded.
+
+        Args:
+            first: first cache state
+            second: second cache state
+
+        Returns:
+            merged cache state
+        """
+
+        # pylint: disable=C0415
+        import torch
+        from torch.nn.functional import pad
+
+        length = max(first["mask"].shape[1], second["mask"].shape[1])
+
+        # Pads the sequence dimension, keys and values are shaped (batch, heads, sequence, dimension)
+        def extend(tensor):
+            return pad(tensor, (0, 0, length - tensor.shape[2], 0))
+
+        return {
+            "layers": [
+                (torch.cat([extend(k1), extend(k2)]), torch.cat([extend(v1), extend(v2)]))
+                for (k1, v1), (k2, v2) in zip(first["layers"], second["layers"])
+            ],
+            "mask": torch.cat([pad(first["mask"], (length - first["mask"].shape[1], 0)), pad(second["mask"], (length - second["mask"].shape[1], 0))]),
+            "tokens": torch.cat([first["tokens"], second["tokens"]]),
+        }
+
+    def layers(self, cache):
+        """
+        Gets the key and value tensors of each layer from a key-value cache.
+
+        Args:
+            cache: model key-value cache
+
+        Returns:
+            list of (keys, values)
+        """
+
+        return [(layer.keys, layer.values) for layer in cache.layers]
+
+    def finished(self, generated, maxtokens, stop):
+        """
+        Checks if a sequence is finished and trims tokens past the end of the sequence.
+
+        Args:
+            generated: list of generated token ids
+            maxtokens: maximum number of new tokens
+            stop: list of stop strings or None
+
+        Returns:
+            (True if finished, trimmed token ids)
+        """
+
+        eos = self.tokenizer.eos_token_id
+        if eos in generated:
+            return True, generated[: generated.index(eos)]
+
+        if len(generated) >= maxtokens:
+            return True, generated[:maxtokens]
+
+        if stop:
+            text = self.text(generated)
+            return any(x in text for x in stop), generated
+
+        return False, generated
+
+    def text(self, generated):
+        """
+        Decodes generated token ids.
+
+        Args:
+            generated: list of generated token ids
+
+        Returns:
+            generated text
+        """
+
+        return self.tokenizer.decode(generated, skip_special_tokens=True).strip()
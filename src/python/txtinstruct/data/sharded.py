@@ -0,0 +1,145 @@
+"""
+Sharded module
+"""
+
+import json
+import random
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from .writer import JSONLWriter, WriterFactory
+
+
+class ShardedBuilder:
+    """
+    Builds a dataset across multiple processes. Input rows are split into batches and batches are assigned to shards round robin.
+    Each shard runs in its own process with its own DatasetBuilder and writes a separate shard file. The random seed is derived from
+    the batch index, which makes the merged output independent of the number of shards. Near-duplicate detection and negative
+    sampling across batches aren't supported, since each shard only sees its own batches.
+    """
+
+    def __init__(self, factory, shards, seed=42):
+        """
+        Creates a new ShardedBuilder.
+
+        Args:
+            factory: picklable callable that returns a DatasetBuilder, called once in each shard process
+            shards: number of shards
+            seed: base random seed
+        """
+
+        self.factory = factory
+        self.shards = shards
+        self.seed = seed
+
+    def __call__(self, rows, output, writer=None, workers=None):
+        """
+        Builds all shards in parallel and merges the shard outputs.
+
+        Args:
+            rows: picklable iterable of {id, text} or a callable that returns one, read by each shard process
+            output: output file path
+            writer: optional output format (json, jsonl or jsonl.gz), inferred from output path when not provided
+            workers: number of worker processes, defaults to the number of shards
+        """
+
+        # Spawn processes to avoid forking a parent with loaded models
+        with ProcessPoolExecutor(max_workers=workers if workers else self.shards, mp_context=get_context("spawn")) as executor:
+            futures = [executor.submit(self.shard, rows, output, shard) for shard in range(self.shards)]
+
+            # Wait for all shards and raise any errors
+            for future in futures:
+                future.result()
+
+        self.merge(output, writer)
+
+    def shard(self, rows, output, shard):
+        """
+        Builds a single shard. This method can be called directly to run shards on separate nodes.
+
+        Args:
+            rows: iterable of {id, text} or a callable that returns one
+            output: output file path
+            shard: shard index
+        """
+
+        builder = self.factory()
+        rows = rows() if callable(rows) else rows
+
+        # Each shard would only detect duplicates within its own batches, which makes output depend on the number of shards
+        if builder.dedup:
+            raise ValueError("Near-duplicate detection isn't supported with sharded builds")
+
+        # Same for negative sampling modes that keep state across batches
+        if builder.negatives.mode != "batch":
+            raise ValueError("Only batch negative sampling is supported with sharded builds")
+
+        with JSONLWriter(self.path(output, shard)) as writer:
+            for index, batch in enumerate(builder.batches(rows)):
+                if index % self.shards == shard:
+                    # Derive seed from batch index
+                    random.seed(f"{self.seed}-{index}")
+
+                    # Shard files store one line per batch
+                    writer.write([{"batch": index, "outputs": builder.generate(batch)}])
+
+    def merge(self, output, writer=None):
+        """
+        Merges shard files into a single output file. Batches are written in input order.
+
+        Args:
+            output: output file path
+            writer: optional output format (json, jsonl or jsonl.gz), inferred from output path when not provided
+        """
+
+        # pylint: disable=R1732
+        shards = [open(self.path(output, shard), "r", encoding="utf-8") for shard in range(self.shards)]
+
+        try:
+            with WriterFactory.create(output, writer) as outputs:
+                index = 0
+                for line in self.lines(shards):
+                    batch = json.loads(line)
+                    if batch["batch"] != index:
+                        raise IOError(f"Shard file is missing batch {index}")
+
+                    outputs.write(batch["outputs"])
+                    index += 1
+        finally:
+            for shard in shards:
+                shard.close()
+
+    def lines(self, shards):
+        """
+        Reads lines from shard files round robin until a shard is exhausted.
+
+        Args:
+            shards: list of open shard files
+
+        Returns:
+            lines in batch order
+        """
+
+        index = 0
+        while True:
+            line = shards[index % len(shards)].readline()
+            if not line:
+                return
+
+            yield line
+            index += 1
+
+    def path(self, output, shard):
+        """
+        Gets the shard file path for a shard.
+
+        Args:
+            output: output file path
+            shard: shard index
+
+        Returns:
+            shard file path
+        """
+
+        return f"{output}.shard-{shard:05d}-of-{self.shards:05d}.jsonl"
@@ -0,0 +1,272 @@
+"""
+Writer module
+"""
+
+import gzip
+import json
+import os
+
+
+class WriterFactory:
+    """
+    Creates dataset output writers.
+    """
+
+    @staticmethod
+    def create(path, writer=None):
+        """
+        Creates a new Writer instance.
+
+        Args:
+            path: output file path
+            writer: output format (json, jsonl, jsonl.gz or arrow), inferred from path when not provided
+
+        Returns:
+            Writer
+        """
+
+        # Infer format from output path
+        writer = writer if writer else WriterFactory.infer(path)
+
+        if writer == "jsonl":
+            return JSONLWriter(path)
+        if writer == "jsonl.gz":
+            return JSONLWriter(path, compress=True)
+        if writer == "json":
+            return JSONWriter(path)
+        if writer == "arrow":
+            return ArrowWriter(path)
+
+        raise ValueError(f"Unsupported output format: {writer}")
+
+    @staticmethod
+    def infer(path):
+        """
+        Infers the output format using the output path extension.
+
+        Args:
+            path: output file path
+
+        Returns:
+            output format
+        """
+
+        path = str(path).lower()
+
+        if path.endswith(".gz"):
+            return "jsonl.gz"
+        if path.endswith(".jsonl"):
+            return "jsonl"
+        if path.endswith(".arrow"):
+            return "arrow"
+
+        return "json"
+
+
+class Writer:
+    """
+    Base class for dataset output writers. Writers are context managers that receive batches of output rows.
+    """
+
+    def __init__(self, path):
+        """
+        Creates a new Writer.
+
+        Args:
+            path: output file path
+        """
+
+        self.path = path
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exception, *args):
+        if exception:
+            self.abort()
+        else:
+            self.close()
+
+    def open(self, offset=None):
+        """
+        Opens the output file.
+
+        Args:
+            offset: optional file offset to resume writing from, output after this offset is discarded
+        """
+
+        raise NotImplementedError
+
+    def write(self, rows):
+        """
+        Writes a batch of rows.
+
+        Args:
+            rows: list of output rows
+        """
+
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Closes the output file.
+        """
+
+        raise NotImplementedError
+
+    def abort(self):
+        """
+        Closes the output file after an error. Output written so far is kept, which allows resuming.
+        """
+
+        self.close()
+
+    def offset(self):
+        """
+        Current output file offset. Writers that can't resume return None.
+
+        Returns:
+            output file offset
+        """
+
+        return None
+
+
+class JSONWriter(Writer):
+    """
+    Writes rows as a single JSON array. Rows are buffered in memory until the writer is closed. Output is only written when the
+    build completes, failed builds leave any existing output file untouched.
+    """
+
+    def __init__(self, path):
+        super().__init__(path)
+
+        self.rows = None
+
+    def open(self, offset=None):
+        if offset is not None:
+            raise ValueError("JSON output can't be resumed, use JSONL output")
+
+        self.rows = []
+
+    def write(self, rows):
+        self.rows.extend(rows)
+
+    def close(self):
+        # Write to a temporary file then move into place
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.rows, f, indent=4)
+
+        os.replace(tmp, self.path)
+        self.rows = None
+
+    def abort(self):
+        # Discard buffered rows, a partial JSON array would be a silently truncated dataset
+        self.rows = None
+
+
+class JSONLWriter(Writer):
+    """
+    Streams rows to a JSON lines file as each batch is produced. When compression is enabled, each batch is written as a
+    separate gzip member. Concatenated gzip members form a valid gzip stream, which keeps the file readable while it's being built.
+    """
+
+    def __init__(self, path, compress=False):
+        """
+        Creates a new JSONLWriter.
+
+        Args:
+            path: output file path
+            compress: gzip compress output if True
+        """
+
+        super().__init__(path)
+
+        self.compress = compress
+        self.output = None
+
+    def open(self, offset=None):
+        # pylint: disable=R1732
+        if offset is None:
+            self.output = open(self.path, "wb")
+        else:
+            # Discard any output written after offset
+            self.output = open(self.path, "r+b")
+            self.output.truncate(offset)
+            self.output.seek(offset)
+
+    def write(self, rows):
+        data = "".join(json.dumps(row) + "\n" for row in rows).encode("utf-8")
+        if self.compress:
+            data = gzip.compress(data)
+
+        # Flush each batch so output can be read while building
+        self.output.write(data)
+        self.output.flush()
+        os.fsync(self.output.fileno())
+
+    def close(self):
+        self.output.close()
+        self.output = None
+
+    def offset(self):
+        return self.output.tell()
+
+
+class ArrowWriter(Writer):
+    """
+    Writes rows as columnar Arrow IPC files in an output directory. Contexts are stored once in contexts.arrow. Statements are stored in
+    statements.arrow and reference contexts by row offset. Each batch is written as a record batch in both files. The files can be
+    memory-mapped and read without parsing, see ArrowReader.
+    """
+
+    def __init__(self, path):
+        super().__init__(path)
+
+        self.contexts, self.statements, self.count = None, None, 0
+
+    def open(self, offset=None):
+        # pylint: disable=C0415
+        import pyarrow as pa
+
+        if offset is not None:
+            raise ValueError("Arrow output can't be resumed, use JSONL output")
+
+        os.makedirs(self.path, exist_ok=True)
+
+        schema = pa.schema([("context", pa.string())])
+        self.contexts = pa.ipc.new_stream(os.path.join(self.path, "contexts.arrow"), schema)
+
+        schema = pa.schema([("context", pa.int64()), ("source", pa.string()), ("target", pa.string())])
+        self.statements = pa.ipc.new_stream(os.path.join(self.path, "statements.arrow"), schema)
+
+        self.count = 0
+
+    def write(self, rows):
+        # pylint: disable=C0415
+        import pyarrow as pa
+
+        # Statements reference contexts by row offset
+        offsets, sources, targets = [], [], []
+        for x, row in enumerate(rows):
+            for statement in row["statements"]:
+                offsets.append(self.count + x)
+                sources.append(statement["source"])
+                targets.append(statement["target"])
+
+        self.contexts.write_batch(pa.record_batch({"context": pa.array([row["context"] for row in rows], pa.string())}))
+        self.statements.write_batch(
+            pa.record_batch(
+                {"context": pa.array(offsets, pa.int64()), "source": pa.array(sources, pa.string()), "target": pa.array(targets, pa.string())}
+            )
+        )
+
+        self.count += len(rows)
+
+    def close(self):
+        self.contexts.close()
+        self.statements.close()
+
+        self.contexts, self.statements = None, None
@@ -1,8 +1,45 @@
 """
 Models imports
+
+Modules are imported on first attribute access. Training dependencies (torch, transformers, datasets) are imported when training
+runs, which keeps imports fast for data generation.
 """
 
-from .bashsql import BashSQL
-from .instructor import Instructor
-from .statement import StatementGenerator
-from .txtsql import TxtSQL
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+# Static imports for linters and type checkers, runtime imports are resolved by __getattr__
+if TYPE_CHECKING:
+    from .augment import Augmentation
+    from .bashsql import BashSQL
+    from .cache import DatasetCache
+    from .expansion import Expansion
+    from .instructor import Instructor
+    from .packer import Packer
+    from .statement import StatementGenerator
+    from .txtsql import TxtSQL
+
+# Public class name to module
+MODULES = {
+    "Augmentation": "augment",
+    "BashSQL": "bashsql",
+    "DatasetCache": "cache",
+    "Expansion": "expansion",
+    "Instructor": "instructor",
+    "Packer": "packer",
+    "StatementGenerator": "statement",
+    "TxtSQL": "txtsql",
+}
+
+__all__ = list(MODULES)
+
+
+def __getattr__(name):
+    if name in MODULES:
+        return getattr(import_module(f".{MODULES[name]}", __name__), name)
+
+    raise AttributeError(f"module {__name__} has no attribute {name}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,121 @@
+"""
+Augment module
+"""
+
+import json
+import os
+import random
+
+from ..prompt import Prompt
+
+
+class Augmentation:
+    """
+    Expands queries into (source, target) training pairs using a declarative template specification.
+
+    A specification has the following keys.
+
+      - templates: list of {source, target} format strings
+      - variables: optional {name: format string}, rendered in order for each query and available to later variables and templates
+      - languages: optional list of language codes, two random picks per query are available as lang1 and lang2
+
+    The following slots are always available: query (normalized query text) and quoted (query wrapped in double quotes when it
+    contains spaces). Templates are validated and compiled when the specification is loaded.
+    """
+
+    def __init__(self, spec):
+        """
+        Creates a new Augmentation.
+
+        Args:
+            spec: specification dict or path to a JSON/YAML specification file
+        """
+
+        spec = self.load(spec) if isinstance(spec, str) else spec
+
+        self.languages = spec.get("languages")
+
+        # Slots available to all templates
+        slots = ["query", "quoted"] + (["lang1", "lang2"] if self.languages else [])
+
+        # Compile variables, each variable can reference slots and previous variables
+        self.variables = []
+        for name, template in spec.get("variables", {}).items():
+            self.variables.append((name, self.compile(template, slots)))
+            slots.append(name)
+
+        # Compile templates
+        self.templates = [(self.compile(template["source"], slots), self.compile(template["target"], slots)) for template in spec["templates"]]
+
+    def __call__(self, queries):
+        """
+        Expands an iterable of queries.
+
+        Args:
+            queries: iterable of queries
+
+        Returns:
+            generated rows
+        """
+
+        for query in queries:
+            yield from self.expand(query)
+
+    def expand(self, query):
+        """
+        Expands a single query into training rows.
+
+        Args:
+            query: input query
+
+        Returns:
+            list of {source, target}
+        """
+
+        query = query.lower().strip().replace('"', '""')
+
+        values = {"query": query, "quoted": f'""{query}""' if " " in query else query}
+        if self.languages:
+            values["lang1"], values["lang2"] = random.choice(self.languages), random.choice(self.languages)
+
+        for name, template in self.variables:
+            values[name] = template(values)
+
+        return [{"source": source(values), "target": target(values)} for source, target in self.templates]
+
+    def compile(self, template, slots):
+        """
+        Validates a template against a list of available slots and compiles it into a renderer.
+
+        Args:
+            template: format string
+            slots: list of available slot names
+
+        Returns:
+            function that renders the template with a dict of slot values
+        """
+
+        return Prompt(template, slots).render
+
+    def load(self, path):
+        """
+        Loads a specification file. Names without a file extension load a specification bundled with this package.
+
+        Args:
+            path: specification file path or bundled specification name
+
+        Returns:
+            specification dict
+        """
+
+        if not os.path.splitext(path)[1]:
+            path = os.path.join(os.path.dirname(__file__), "templates", f"{path}.json")
+
+        with open(path, "r", encoding="utf-8") as f:
+            if path.lower().endswith((".yml", ".yaml")):
+                # pylint: disable=C0415
+                import yaml
+
+                return yaml.safe_load(f)
+
+            return json.load(f)
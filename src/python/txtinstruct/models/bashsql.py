@@ -2,9 +2,12 @@
 BashSQL module
 """
 
+import hashlib
+import os
 import random
 
-from txtai.pipeline import HFTrainer
+from .augment import Augmentation
+from .expansion import Expansion
 
 
 class BashSQL:
@@ -12,30 +15,49 @@ class BashSQL:
     Trains a bash to sql sequence to sequence model.
     """
 
-    def __init__(self):
+    def __init__(self, spec=None):
         """
         Creates a new BashSQL instance.
+
+        Args:
+            spec: optional augmentation specification dict or file path, defaults to the bundled bashsql specification
         """
 
+        # Query augmentation templates
+        self.augmentation = Augmentation(spec if spec else "bashsql")
+
         # Set seed (to generate consistent output) and run
         random.seed(1024)
 
-    def __call__(self, path, output):
+    def __call__(self, path, output, workers=None):
         """
         Trains a bashsql model.
 
         Args:
             path: path to input data file
             output: model output path
+            workers: optional number of processes used to expand queries in parallel, expanded data is stored in output/data
 
         Returns:
             (model, tokenizer)
         """
 
+        # Training dependencies are imported on first use, see models package
+        # pylint: disable=C0415
+        from datasets import Dataset
+        from txtai.pipeline import HFTrainer
+
+        # Generate training data
+        if workers:
+            data = Dataset.from_parquet(Expansion(self.augmentation, workers)(path, os.path.join(output, "data")))
+        else:
+            # The datasets cache is keyed by generator arguments, include the file contents so edits aren't served from the cache
+            data = Dataset.from_generator(self.generate, gen_kwargs={"path": path, "digest": self.digest(path)})
+
         train = HFTrainer()
         return train(
             "t5-small",
-            self.generate(path),
+            data,
             task="sequence-sequence",
             prefix="translate Bash to SQL: ",
             maxlength=512,
@@ -45,100 +67,36 @@ class BashSQL:
             overwrite_output_dir=True,
         )
 
-    def generate(self, path):
+    # pylint: disable=W0613
+    def generate(self, path, digest=None):
         """
-        Generates bashsql data.
+        Generates bashsql data. Rows are yielded as each query is expanded, so memory usage stays constant as the queries file grows.
 
         Args:
             path: path to queries file
-            outfile: output file path
+            digest: queries file content hash, only used to key the Hugging Face datasets cache
 
         Returns:
             generated data
         """
 
-        output = []
         with open(path, "r", encoding="utf-8") as queries:
-            for query in queries:
-                query = query.lower().strip().replace('"', '""')
-                find = f'find -name ""{query}""' if " " in query else f"find -name {query}"
-                sql = f"select id, text, score from txtai where similar('{query}')"
-
-                # Standard query
-                self.append(output, find, sql)
-
-                # Query by date
-                self.append(output, f"{find} -mtime -1", f"{sql} and entry >= date('now', '-1 day')")
-                self.append(output, f"{find} -mtime -1.5", f"{sql} and entry >= date('now', '-1.5 day')")
-                self.append(output, f"{find} -mtime -2", f"{sql} and entry >= date('now', '-2 day')")
-
-                # Query by score (t5 models map < to unk token, use $= as workaround)
-                self.append(output, f"{find} -score +0.5", f"{sql} and score >= 0.5")
-                self.append(output, f"{find} -score -0.7", f"{sql} and score $= 0.7")
-
-                # Query by date and score
-                self.append(output, f"{find} -mtime -1 -score -0.5", f"{sql} and entry >= date('now', '-1 day') and score $= 0.5")
-                self.append(output, f"{find} -score +0.2 -mtime -1", f"{sql} and score >= 0.2 and entry >= date('now', '-1 day')")
-
-                # Query by text field
-                self.append(output, f"{find} -field value", f"{sql} and field = 'value'")
-                self.append(output, f'{find} -field "multi value"', f"{sql} and field = 'multi value'")
-
-                # Query by numeric field
-                self.append(output, f"{find} -quantity 1", f"{sql} and quantity = 1")
-                self.append(output, f"{find} -quantity +50", f"{sql} and quantity >= 50")
-                self.append(output, f"{find} -quantity -50", f"{sql} and quantity $= 50")
-
-                # Query with contains
-                self.append(output, f"{find} -text ~data", f"{sql} and text like '%data%'")
-                self.append(output, f"{find} -field ~value", f"{sql} and field like '%value%'")
-                self.append(output, f"{find} -text ~snippet", f"{sql} and text like '%snippet%'")
-
-                # Aggregates
-                self.append(output, f"{find} -count", f"select count(*) from txtai where similar('{query}')")
-                self.append(output, f"{find} -average", f"select avg(score) from txtai where similar('{query}')")
-
-                # Translate
-                lang = ["ar", "en", "fr", "de", "hi", "it", "nl", "ro", "ru", "zh"]
-                lang1, lang2 = random.choice(lang), random.choice(lang)
-                self.append(
-                    output, f"{find} -translate {lang1}", f"select id, translate(text, '{lang1}') text, score from txtai where similar('{query}')"
-                )
-                self.append(
-                    output, f"{find} -translate {lang2}", f"select id, translate(text, '{lang2}') text, score from txtai where similar('{query}')"
-                )
-                self.append(
-                    output,
-                    f"{find} -mtime -1 -field 0 -translate {lang1}",
-                    f"select id, translate(text, '{lang1}') text, score from txtai where similar('{query}') "
-                    + "and entry >= ('now', '-1 day') and field = 0",
-                )
-
-                # Summary
-                self.append(output, f"{find} -summary", f"select id, summary(text) text, score from txtai where similar('{query}')")
-                self.append(
-                    output,
-                    f"{find} -mtime -1 -summary",
-                    f"select id, summary(text) text, score from txtai where similar('{query}') and entry >= date('now', '-1 day')",
-                )
-
-                # Limit
-                self.append(output, f"{find} -limit 1", f"{sql} limit 1")
-                self.append(
-                    output,
-                    f"{find} -limit 5 -summary",
-                    f"select id, summary(text) text, score from txtai where similar('{query}') and entry >= date('now', '-1 day') limit 5",
-                )
-
-        return output
-
-    def append(self, output, source, target):
+            yield from self.augmentation(queries)
+
+    def digest(self, path):
         """
-        Adds a new row to output.
+        Calculates a content hash for a queries file.
 
         Args:
-            source: source text
-            target: target text
+            path: path to queries file
+
+        Returns:
+            content hash
         """
 
-        output.append({"source": source, "target": target})
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+
+        return digest.hexdigest()
@@ -0,0 +1,132 @@
+"""
+Cache module
+"""
+
+import hashlib
+import json
+import os
+import shutil
+
+
+class DatasetCache:
+    """
+    Caches prompt-formatted training datasets as memory-mapped Arrow files. Datasets are keyed by the input data fingerprint, model
+    task, prompt, tokenizer and maximum sequence length.
+
+    Cached datasets are file-backed, so tokenization run on them by HFTrainer is also cached next to the dataset and reused when the
+    same tokenizer and settings are used again.
+    """
+
+    def __init__(self, path):
+        """
+        Creates a new DatasetCache.
+
+        Args:
+            path: cache directory
+        """
+
+        self.path = path
+
+    def __call__(self, generate, data, task, prompt, base, maxlength=None, packer=None):
+        """
+        Loads a cached training dataset, building and caching it when not found.
+
+        Args:
+            generate: generator function that formats training rows, called with data, task and prompt
+            data: input data
+            task: model task
+            prompt: prompt template
+            base: input model or model path
+            maxlength: maximum sequence length
+            packer: optional sequence Packer passed to generate
+
+        Returns:
+            Dataset
+        """
+
+        # Imported on first use, see models package
+        # pylint: disable=C0415
+        from datasets import Dataset, load_from_disk
+
+        path = os.path.join(self.path, self.key(data, task, prompt, base, maxlength, packer))
+
+        if not os.path.exists(path):
+            # Only pass packer when set, generate functions that don't pack don't accept it
+            kwargs = {"data": data, "task": task, "prompt": prompt, **({"packer": packer} if packer else {})}
+            dataset = Dataset.from_generator(generate, gen_kwargs=kwargs)
+
+            # Save to a temporary directory then move into place
+            tmp = f"{path}.tmp"
+            shutil.rmtree(tmp, ignore_errors=True)
+            dataset.save_to_disk(tmp)
+            os.replace(tmp, path)
+
+        return load_from_disk(path)
+
+    def key(self, data, task, prompt, base, maxlength, packer):
+        """
+        Builds a cache key.
+
+        Args:
+            data: input data
+            task: model task
+            prompt: prompt template
+            base: input model or model path
+            maxlength: maximum sequence length
+            packer: sequence Packer
+
+        Returns:
+            cache key
+        """
+
+        packing = [packer.maxlength, packer.capacity] if packer else None
+
+        digest = hashlib.sha256()
+        digest.update(json.dumps([self.fingerprint(data), task, prompt, self.tokenizer(base), maxlength, packing]).encode("utf-8"))
+
+        return digest.hexdigest()
+
+    def fingerprint(self, data):
+        """
+        Calculates a fingerprint for input data. Data other than Hugging Face datasets is read in full, so it must support multiple
+        iterations.
+
+        Args:
+            data: input data
+
+        Returns:
+            data fingerprint
+        """
+
+        # Hugging Face datasets already have a fingerprint
+        if hasattr(data, "_fingerprint"):
+            # pylint: disable=W0212
+            return data._fingerprint
+
+        # Data is read twice, once for the fingerprint and once to build the dataset
+        if iter(data) is data:
+            raise ValueError("Cached training data must be re-iterable, for example a list, Dataset or Reader, not a one-shot iterator")
+
+        digest = hashlib.sha256()
+        for row in data:
+            digest.update(json.dumps(row, sort_keys=True).encode("utf-8"))
+
+        return digest.hexdigest()
+
+    def tokenizer(self, base):
+        """
+        Gets the tokenizer identity for an input model.
+
+        Args:
+            base: input model or model path
+
+        Returns:
+            tokenizer identity
+        """
+
+        if isinstance(base, str):
+            return base
+
+        # (model, tokenizer) tuple
+        tokenizer = base[1]
+        return [tokenizer.name_or_path, len(tokenizer)]
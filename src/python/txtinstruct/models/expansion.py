@@ -0,0 +1,139 @@
+"""
+Expansion module
+"""
+
+import os
+import random
+
+from concurrent.futures import ProcessPoolExecutor
+
+
+class Expansion:
+    """
+    Expands a queries file in parallel. The file is split into fixed size byte ranges aligned to line boundaries and each range is
+    expanded in a worker process. Each range uses a seed derived from the range index, which keeps output deterministic regardless of
+    the number of workers. Expanded rows are written to a sharded Parquet dataset.
+    """
+
+    def __init__(self, augmentation, workers=None, chunksize=16 * 1024 * 1024, seed=1024):
+        """
+        Creates a new Expansion.
+
+        Args:
+            augmentation: Augmentation instance
+            workers: number of worker processes, defaults to the number of CPUs
+            chunksize: number of bytes per range
+            seed: base random seed
+        """
+
+        self.augmentation = augmentation
+        self.workers = workers
+        self.chunksize = chunksize
+        self.seed = seed
+
+    def __call__(self, path, output):
+        """
+        Expands a queries file.
+
+        Args:
+            path: path to queries file
+            output: output directory for Parquet files
+
+        Returns:
+            list of Parquet file paths, in input order
+        """
+
+        os.makedirs(output, exist_ok=True)
+
+        ranges = self.ranges(path)
+        files = [os.path.join(output, f"part-{x:05d}-of-{len(ranges):05d}.parquet") for x in range(len(ranges))]
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            # Wait for all ranges and raise any errors
+            list(executor.map(self.expand, [path] * len(ranges), ranges, range(len(ranges)), files))
+
+        return files
+
+    def ranges(self, path):
+        """
+        Splits a file into byte ranges aligned to line boundaries.
+
+        Args:
+            path: input file path
+
+        Returns:
+            list of (start, end) byte offsets
+        """
+
+        size, offsets = os.path.getsize(path), [0]
+        with open(path, "rb") as f:
+            for offset in range(self.chunksize, size, self.chunksize):
+                # Move offset to the start of the next line
+                f.seek(offset - 1)
+                f.readline()
+
+                if f.tell() > offsets[-1]:
+                    offsets.append(f.tell())
+
+        offsets.append(size)
+        return [(start, end) for start, end in zip(offsets, offsets[1:]) if end > start]
+
+    def expand(self, path, offsets, index, output):
+        """
+        Expands a byte range of a queries file and writes the rows to a Parquet file.
+
+        Args:
+            path: path to queries file
+            offsets: (start, end) byte offsets
+            index: range index
+            output: output Parquet file path
+        """
+
+        # Derive seed from range index
+        random.seed(f"{self.seed}-{index}")
+
+        start, end = offsets
+        writer, rows = None, []
+
+        with open(path, "rb") as f:
+            f.seek(start)
+            while f.tell() < end:
+                rows.extend(self.augmentation.expand(f.readline().decode("utf-8")))
+
+                # Write rows in batches
+                if len(rows) >= 10000:
+                    writer = self.write(writer, output, rows)
+                    rows = []
+
+        if rows or not writer:
+            writer = self.write(writer, output, rows)
+
+        writer.close()
+
+    def write(self, writer, output, rows):
+        """
+        Writes a batch of rows to a Parquet file.
+
+        Args:
+            writer: ParquetWriter, created on first call when None
+            output: output Parquet file path
+            rows: list of {source, target}
+
+        Returns:
+            ParquetWriter
+        """
+
+        # Imported on first use, see models package
+        # pylint: disable=C0415
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pydict(
+            {"source": [row["source"] for row in rows], "target": [row["target"] for row in rows]},
+            schema=pa.schema([("source", pa.string()), ("target", pa.string())]),
+        )
+
+        writer = writer if writer else pq.ParquetWriter(output, table.schema)
+        writer.write_table(table)
+
+        return writer
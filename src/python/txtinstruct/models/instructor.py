@@ -2,11 +2,9 @@
 Instructor module
 """
 
-from string import Formatter
-
-from datasets import Dataset
-
-from txtai.pipeline import HFTrainer
+from ..prompt import Prompt
+from .cache import DatasetCache
+from .packer import Packer
 
 
 class Instructor:
@@ -14,32 +12,61 @@ class Instructor:
     Trains a model using an instruction-tuning dataset.
     """
 
-    def __call__(self, base, data, task, prompt=None, **kwargs):
+    def __call__(self, base, data, task, prompt=None, cache=None, packing=False, lora=None, quantize=None, **kwargs):
         """
         Trains an instructor model.
 
         Args:
             base: input model or model path
-            data: instruction-tuning dataset
+            data: instruction-tuning dataset, for example DatasetBuilder output read with ArrowReader
             task: model task
             prompt: optional prompt template, uses default when not provided
+            cache: optional directory used to cache prompt-formatted training datasets across runs
+            packing: packs multiple examples into each training sequence for language-generation models if True, requires a txtai
+                     version with the HFTrainer merge option
+            lora: trains low-rank adapters over a frozen base model when set, True for defaults or a dict of LoRA settings, only adapter
+                  weights are saved
+            quantize: loads the base model quantized when set, True for 4-bit defaults or a dict of bitsandbytes settings such as
+                      {"load_in_8bit": True}, requires lora
             kwargs: additional training arguments, see HFTrainer docs
 
         Returns:
             (model, tokenizer)
         """
 
+        if quantize and not lora:
+            raise ValueError("quantize requires lora, quantized base models can only be trained with adapters")
+
+        # Training dependencies are imported on first use, see models package
+        # pylint: disable=C0415
+        from datasets import Dataset
+        from txtai.pipeline import HFTrainer
+
         # Get prompt
         prompt = prompt if prompt else self.defaultprompt(task)
 
+        # Create sequence packer
+        packer = self.packer(base, kwargs.get("maxlength")) if packing and task == "language-generation" else None
+
         # Build training dataset
-        train = Dataset.from_generator(self.generate, gen_kwargs=({"data": data, "task": task, "prompt": prompt}))
+        if cache:
+            train = DatasetCache(cache)(self.generate, data, task, prompt, base, kwargs.get("maxlength"), packer)
+        else:
+            train = Dataset.from_generator(self.generate, gen_kwargs=({"data": data, "task": task, "prompt": prompt, "packer": packer}))
+
+        # Parameter-efficient training arguments are only passed when enabled
+        if lora:
+            kwargs = {**kwargs, "lora": lora, "quantize": quantize}
+
+        # Keep each packed sequence as a training row instead of concatenating and splitting rows at maxlength
+        if packer:
+            kwargs = {**kwargs, "maxlength": packer.maxlength, "merge": None}
 
         # Train model
         trainer = HFTrainer()
         return trainer(base, train, task=task, **kwargs)
 
-    def generate(self, data, task, prompt):
+    def generate(self, data, task, prompt, packer=None):
         """
         Generates an instruction-tuning dataset for training. This method generates fields based on the model task.
 
@@ -47,17 +74,48 @@ class Instructor:
             data: instruction-tuning dataset
             task: model task
             prompt: input prompt template
+            packer: optional Packer, packs language generation examples into fixed length sequences
         """
 
-        # Template formatter
-        formatter = Formatter()
+        # Pack formatted examples
+        if packer:
+            for text in packer(row["text"] for row in self.generate(data, task, prompt)):
+                yield {"text": text}
+
+            return
+
+        # Compile prompt template
+        prompt = Prompt(prompt, ["statement", "context"])
 
         for row in data:
             for statement in row["statements"]:
                 if task == "language-generation":
-                    yield {"text": formatter.format(prompt, statement=statement["source"], context=row["context"]) + statement["target"]}
+                    yield {"text": prompt(statement=statement["source"], context=row["context"]) + statement["target"]}
                 else:
-                    yield {"source": formatter.format(prompt, statement=statement["source"], context=row["context"]), "target": statement["target"]}
+                    yield {"source": prompt(statement=statement["source"], context=row["context"]), "target": statement["target"]}
+
+    def packer(self, base, maxlength):
+        """
+        Creates a sequence packer for an input model.
+
+        Args:
+            base: input model or model path
+            maxlength: maximum sequence length, clipped to and defaults to the tokenizer maximum length
+
+        Returns:
+            Packer
+        """
+
+        # pylint: disable=C0415
+        from transformers import AutoTokenizer
+
+        tokenizer = AutoTokenizer.from_pretrained(base) if isinstance(base, str) else base[1]
+
+        # Tokenizers without a maximum length report a very large default
+        if not maxlength and tokenizer.model_max_length > 1000000:
+            raise ValueError("packing requires maxlength when the tokenizer doesn't set a maximum length")
+
+        return Packer(tokenizer, min(maxlength, tokenizer.model_max_length) if maxlength else tokenizer.model_max_length)
 
     def defaultprompt(self, task):
         """
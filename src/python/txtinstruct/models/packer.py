@@ -0,0 +1,117 @@
+"""
+Packer module
+"""
+
+from bisect import bisect_left, insort
+
+
+class Packer:
+    """
+    Packs formatted training examples into sequences of up to maxlength tokens. Examples are kept whole and each example is terminated
+    with the tokenizer's end of sequence token, which separates examples within a packed sequence. Examples are packed best-fit
+    decreasing over a bounded buffer, so packing streams over large datasets.
+
+    Packed sequences are tokenized again for training with special tokens added, space for those tokens is reserved in each sequence.
+    Examples longer than a full sequence are truncated when the tokenizer supports offset mappings, otherwise they're kept whole on
+    their own. Attention isn't masked between examples within a sequence.
+    """
+
+    def __init__(self, tokenizer, maxlength, buffer=10000):
+        """
+        Creates a new Packer.
+
+        Args:
+            tokenizer: model tokenizer
+            maxlength: maximum number of tokens per packed sequence, including special tokens
+            buffer: number of examples packed at a time
+        """
+
+        self.tokenizer = tokenizer
+        self.maxlength = maxlength
+        self.buffer = buffer
+
+        # Number of tokens available for examples
+        self.capacity = maxlength - tokenizer.num_special_tokens_to_add()
+        if self.capacity <= 0:
+            raise ValueError(f"maxlength {maxlength} leaves no space for examples")
+
+    def __call__(self, texts):
+        """
+        Packs an iterable of texts.
+
+        Args:
+            texts: iterable of formatted examples
+
+        Returns:
+            packed sequences
+        """
+
+        batch = []
+        for text in texts:
+            batch.append(text + self.tokenizer.eos_token)
+
+            if len(batch) == self.buffer:
+                yield from self.pack(batch)
+                batch = []
+
+        if batch:
+            yield from self.pack(batch)
+
+    def pack(self, texts):
+        """
+        Packs a batch of texts.
+
+        Args:
+            texts: list of examples
+
+        Returns:
+            packed sequences
+        """
+
+        texts, lengths = self.truncate(texts)
+
+        # Remaining space as a sorted list of (space, sequence index)
+        sequences, remaining = [], []
+
+        for x in sorted(range(len(texts)), key=lambda x: lengths[x], reverse=True):
+            # Find the sequence with the least remaining space that fits this example
+            index = bisect_left(remaining, (lengths[x], -1))
+            if index < len(remaining):
+                space, sequence = remaining.pop(index)
+                sequences[sequence].append(x)
+            else:
+                # Start a new sequence
+                space, sequence = self.capacity, len(sequences)
+                sequences.append([x])
+
+            insort(remaining, (space - lengths[x], sequence))
+
+        for sequence in sequences:
+            yield "".join(texts[x] for x in sequence)
+
+    def truncate(self, texts):
+        """
+        Measures examples in tokens and truncates examples longer than a full sequence.
+
+        Args:
+            texts: list of examples
+
+        Returns:
+            (examples, token lengths)
+        """
+
+        fast = self.tokenizer.is_fast
+        tokens = self.tokenizer(texts, add_special_tokens=False, return_offsets_mapping=fast)
+
+        lengths = []
+        for x, ids in enumerate(tokens["input_ids"]):
+            if len(ids) > self.capacity and fast:
+                # Cut text at the end of the last token that fits, end of sequence token included
+                eos = len(self.tokenizer(self.tokenizer.eos_token, add_special_tokens=False)["input_ids"])
+                end = tokens["offset_mapping"][x][self.capacity - eos - 1][1]
+                texts[x] = texts[x][:end] + self.tokenizer.eos_token
+                ids = self.tokenizer(texts[x], add_special_tokens=False)["input_ids"]
+
+            lengths.append(len(ids))
+
+        return texts, lengths
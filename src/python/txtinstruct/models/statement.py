@@ -2,11 +2,9 @@
 Statement module
 """
 
-from string import Formatter
-
-from datasets import Dataset
-
-from txtai.pipeline import HFTrainer
+from ..data import DatasetBuilder
+from ..prompt import Prompt
+from .cache import DatasetCache
 
 
 class StatementGenerator:
@@ -14,26 +12,46 @@ class StatementGenerator:
     Trains a statement generator model.
     """
 
-    def __call__(self, base, data, task, prompt=None, **kwargs):
+    def __call__(self, base, data, task, prompt=None, cache=None, lora=None, quantize=None, **kwargs):
         """
         Train a statement generator model.
 
         Args:
             base: input model or model path
-            data: instruction-tuning dataset
+            data: instruction-tuning dataset, for example DatasetBuilder output read with ArrowReader
             task: model task
             prompt: optional prompt template, uses default when not provided
+            cache: optional directory used to cache prompt-formatted training datasets across runs
+            lora: trains low-rank adapters over a frozen base model when set, True for defaults or a dict of LoRA settings, only adapter
+                  weights are saved
+            quantize: loads the base model quantized when set, True for 4-bit defaults or a dict of bitsandbytes settings such as
+                      {"load_in_8bit": True}, requires lora
             kwargs: additional training arguments, see HFTrainer docs
 
         Returns:
             (model, tokenizer)
         """
 
+        if quantize and not lora:
+            raise ValueError("quantize requires lora, quantized base models can only be trained with adapters")
+
+        # Training dependencies are imported on first use, see models package
+        # pylint: disable=C0415
+        from datasets import Dataset
+        from txtai.pipeline import HFTrainer
+
         # Get prompt
         prompt = prompt if prompt else self.defaultprompt(task)
 
         # Build training dataset
-        train = Dataset.from_generator(self.generate, gen_kwargs=({"data": data, "task": task, "prompt": prompt}))
+        if cache:
+            train = DatasetCache(cache)(self.generate, data, task, prompt, base, kwargs.get("maxlength"))
+        else:
+            train = Dataset.from_generator(self.generate, gen_kwargs=({"data": data, "task": task, "prompt": prompt}))
+
+        # Parameter-efficient training arguments are only passed when enabled
+        if lora:
+            kwargs = {**kwargs, "lora": lora, "quantize": quantize}
 
         # Train model
         trainer = HFTrainer()
@@ -44,22 +62,29 @@ class StatementGenerator:
         Generates a statement generation dataset for training. This method generates fields based on the model task.
 
         Args:
-            data: statement generation dataset
+            data: statement generation dataset with context and question fields or DatasetBuilder output
             task: model task
             prompt: input prompt template
         """
 
-        # Template formatter
-        formatter = Formatter()
+        # Compile prompt template
+        prompt = Prompt(prompt, ["context"])
 
         for row in data:
             # Generate question context
             context = row["context"]
 
-            if task == "language-generation":
-                yield {"text": formatter.format(prompt, context=context) + row["question"]}
+            # DatasetBuilder output rows store questions as statements, unanswerable statements aren't about the context
+            if "statements" in row:
+                questions = [x["source"] for x in row["statements"] if x["target"] != DatasetBuilder.UNANSWERABLE]
             else:
-                yield {"source": formatter.format(prompt, context=context), "target": row["question"]}
+                questions = [row["question"]]
+
+            for question in questions:
+                if task == "language-generation":
+                    yield {"text": prompt(context=context) + question}
+                else:
+                    yield {"source": prompt(context=context), "target": question}
 
     def defaultprompt(self, task):
         """
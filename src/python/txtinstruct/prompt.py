@@ -0,0 +1,119 @@
+"""
+Prompt module
+"""
+
+from functools import partial
+from string import Formatter
+
+
+class Prompt:
+    """
+    Prompt template. Templates are parsed and validated once when created and compiled into a list of literal text and field parts.
+    Rendering joins the parts without parsing the template again. Invalid placeholders are caught before generation or training starts.
+    """
+
+    def __init__(self, template, fields):
+        """
+        Creates a new Prompt.
+
+        Args:
+            template: format string template
+            fields: list of allowed field names
+        """
+
+        self.template = template
+
+        # Compiled template as a list of (literal text, field name or None, field formatter)
+        self.parts = []
+        for literal, field, spec, conversion in Formatter().parse(template):
+            if field is not None and field not in fields:
+                raise ValueError(f"Unknown field '{field}' in template '{template}'. Allowed fields: {list(fields)}")
+
+            self.parts.append((literal, field, self.formatter(spec, conversion) if field is not None else None))
+
+        self.fields = [field for _, field, _ in self.parts if field is not None]
+
+    def __call__(self, **kwargs):
+        """
+        Renders the template.
+
+        Args:
+            kwargs: field values
+
+        Returns:
+            rendered text
+        """
+
+        return self.render(kwargs)
+
+    def __str__(self):
+        return self.template
+
+    def render(self, values):
+        """
+        Renders the template with a dict of field values.
+
+        Args:
+            values: dict of field values
+
+        Returns:
+            rendered text
+        """
+
+        return "".join([literal if field is None else literal + formatter(values[field]) for literal, field, formatter in self.parts])
+
+    def batch(self, **kwargs):
+        """
+        Renders the template for a batch of field values.
+
+        Args:
+            kwargs: lists of field values, all lists must have the same length
+
+        Returns:
+            list of rendered text
+        """
+
+        lengths = {field: len(values) for field, values in kwargs.items()}
+        sizes = set(lengths.values())
+        if len(sizes) > 1:
+            raise ValueError(f"Field value lists must have the same length: {lengths}")
+
+        # Resolve field value lists once per batch
+        parts = [(literal, kwargs[field] if field is not None else None, formatter) for literal, field, formatter in self.parts]
+        size = sizes.pop() if sizes else 0
+
+        return ["".join([literal if values is None else literal + formatter(values[x]) for literal, values, formatter in parts]) for x in range(size)]
+
+    def formatter(self, spec, conversion):
+        """
+        Creates a field formatter.
+
+        Args:
+            spec: format specification
+            conversion: conversion flag (r, s or a) or None
+
+        Returns:
+            function that formats a field value
+        """
+
+        # Plain fields are the common case
+        if not spec and not conversion:
+            return str
+
+        convert = {"r": repr, "s": str, "a": ascii}[conversion] if conversion else None
+        return partial(self.format, spec=spec, convert=convert)
+
+    def format(self, value, spec, convert):
+        """
+        Formats a field value with a format specification and conversion.
+
+        Args:
+            value: field value
+            spec: format specification
+            convert: conversion function or None
+
+        Returns:
+            formatted value
+        """
+
+        return format(convert(value) if convert else value, spec)
@@ -0,0 +1,241 @@
+"""
+Asynchronous module tests
+"""
+
+import json
+import os
+import tempfile
+import threading
+import unittest
+import zlib
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.error import HTTPError
+
+from txtinstruct.data import AsyncDatasetBuilder, DatasetBuilder, Negatives, RemoteModel
+
+
+class Handler(BaseHTTPRequestHandler):
+    """
+    Stub completions server. The first request for a third of prompts fails with a 503 and for another third with a 429, retries
+    succeed. Requests fail with a 400 while the server is broken.
+    """
+
+    def do_POST(self):
+        """
+        Handles a completion request.
+        """
+
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        prompt, server = body["prompt"], self.server
+
+        with server.lock:
+            server.attempts[prompt] = server.attempts.get(prompt, 0) + 1
+            attempt, broken = server.attempts[prompt], server.broken
+
+        code = zlib.crc32(prompt.encode("utf-8")) % 3
+        if broken:
+            self.respond(400)
+        elif attempt == 1 and code == 0:
+            self.respond(503)
+        elif attempt == 1 and code == 1:
+            self.respond(429, {"Retry-After": "0"})
+        else:
+            # Vary latency to complete requests out of order
+            threading.Event().wait(code * 0.01)
+            self.respond(200, data={"choices": [{"text": f" {body['model']}:{len(prompt)}:{prompt[-16:]} "}]})
+
+    def respond(self, code, headers=None, data=None):
+        """
+        Sends a response.
+
+        Args:
+            code: HTTP status code
+            headers: optional response headers
+            data: optional JSON response
+        """
+
+        data = json.dumps(data).encode("utf-8") if data else b""
+
+        self.send_response(code)
+        for key, value in (headers if headers else {}).items():
+            self.send_header(key, value)
+
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+        with self.server.lock:
+            self.server.codes[code] = self.server.codes.get(code, 0) + 1
+
+    def log_message(self, *args):
+        # pylint: disable=W0221
+        pass
+
+
+class TestAsynchronous(unittest.TestCase):
+    """
+    AsyncDatasetBuilder and RemoteModel tests against a stub completions server
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        Starts the stub server.
+        """
+
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        cls.server.lock, cls.server.attempts, cls.server.codes, cls.server.broken = threading.Lock(), {}, {}, False
+
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}/v1"
+
+    @classmethod
+    def tearDownClass(cls):
+        """
+        Stops the stub server.
+        """
+
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        """
+        Resets server state.
+        """
+
+        self.server.attempts, self.server.codes, self.server.broken = {}, {}, False
+
+    def testOrder(self):
+        """
+        Test results are returned in input order with retries on 5xx and 429 responses
+        """
+
+        texts = [f"text {x}" for x in range(50)]
+        results = self.model("target")(texts)
+
+        self.assertEqual(results, [f"target:{len(text)}:{text[-16:]}" for text in texts])
+        self.assertGreater(self.server.codes.get(503, 0), 0)
+        self.assertGreater(self.server.codes.get(429, 0), 0)
+
+    def testErrors(self):
+        """
+        Test client errors aren't retried
+        """
+
+        self.server.broken = True
+
+        with self.assertRaises(HTTPError):
+            self.model("target")(["text"])
+
+        self.assertEqual(self.server.attempts["text"], 1)
+
+    def testBuild(self):
+        """
+        Test asynchronous build output matches synchronous build output
+        """
+
+        with tempfile.TemporaryDirectory() as path:
+            self.builder(DatasetBuilder)(self.rows(), 30, os.path.join(path, "sync.jsonl"))
+            self.builder(AsyncDatasetBuilder)(self.rows(), 30, os.path.join(path, "async.jsonl"))
+
+            self.assertEqual(self.read(path, "sync.jsonl"), self.read(path, "async.jsonl"))
+
+    def testResume(self):
+        """
+        Test resuming an interrupted build matches an uninterrupted build
+        """
+
+        with tempfile.TemporaryDirectory() as path:
+            self.builder(AsyncDatasetBuilder)(self.rows(), 30, os.path.join(path, "full.jsonl"))
+
+            # Fail requests starting with the sixth batch, at most three batches are pending, so the first two batches are written
+            with self.assertRaises(HTTPError):
+                self.builder(AsyncDatasetBuilder)(self.interrupt(self.rows(), 20), 30, os.path.join(path, "resume.jsonl"))
+
+            with open(os.path.join(path, "resume.jsonl.checkpoint"), "r", encoding="utf-8") as f:
+                self.assertGreater(json.load(f)["index"], 0)
+
+            self.server.broken = False
+            self.builder(AsyncDatasetBuilder)(self.rows(), 30, os.path.join(path, "resume.jsonl"), resume=True)
+
+            self.assertEqual(self.read(path, "full.jsonl"), self.read(path, "resume.jsonl"))
+
+    def model(self, name):
+        """
+        Creates a RemoteModel for the stub server.
+
+        Args:
+            name: model name
+
+        Returns:
+            RemoteModel
+        """
+
+        return RemoteModel(self.url, name, concurrency=8, backoff=0.001)
+
+    def builder(self, builder):
+        """
+        Creates a builder with remote models and reservoir negative sampling.
+
+        Args:
+            builder: builder class
+
+        Returns:
+            builder
+        """
+
+        kwargs = {"window": 3} if builder is AsyncDatasetBuilder else {}
+        return builder(
+            self.model("target"),
+            self.model("statement"),
+            templates=["Tell me about {text}"],
+            prompt="{statement} {context}",
+            sprompt="{context}",
+            batch=4,
+            negatives=Negatives("reservoir", size=5),
+            **kwargs,
+        )
+
+    def rows(self):
+        """
+        Generates input rows.
+
+        Returns:
+            list of rows
+        """
+
+        return [{"id": f"id{x}", "text": f"text number {x} " * (1 + x % 5)} for x in range(30)]
+
+    def interrupt(self, rows, index):
+        """
+        Yields rows and breaks the server after index rows.
+
+        Args:
+            rows: input rows
+            index: number of rows read before the server fails requests
+
+        Returns:
+            rows
+        """
+
+        for x, row in enumerate(rows):
+            if x == index:
+                self.server.broken = True
+
+            yield row
+
+    def read(self, path, name):
+        """
+        Reads an output file.
+
+        Args:
+            path: directory
+            name: file name
+
+        Returns:
+            file contents
+        """
+
+        with open(os.path.join(path, name), "r", encoding="utf-8") as f:
+            return f.read()